@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+import argparse
+import subprocess
+import sys
+from typing import Dict
+from typing import List
+from typing import Optional
+
+
+# Only some windows need these, they must not be imported at startup
+DEFERRED_MODULES = (
+    'darkdetect',
+    'numpy',
+    'pyqtgraph',
+    'quiz_window',
+    'stats_window',
+)
+
+
+def import_times(module: str) -> Dict[str, int]:
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # import time: self [us] | cumulative | imported package
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check startup import time against a budget.')
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--budget-ms', type=int, default=500)
+    parser.add_argument('--top', type=int, default=10, help='number of slowest imports to show')
+    args = parser.parse_args(argv)
+
+    times = import_times(args.module)
+    for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'{cumulative / 1000:8.1f} ms  {name}')
+
+    failed = False
+    total_ms = times[args.module] / 1000
+    print(f'{args.module}: {total_ms:.1f} ms, budget {args.budget_ms} ms')
+    if total_ms > args.budget_ms:
+        failed = True
+    eager = [name for name in DEFERRED_MODULES if name in times]
+    if eager:
+        print(f'imported at startup: {", ".join(eager)}')
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+from enums import CheckState
+
+
+ChildrenGetter = Callable[[Path], Optional[List[Path]]]
+
+
+# A path is checked when its nearest overridden ancestor (or itself) is
+# checked. Overrides are kept only where the state differs from the parent.
+class CheckTree:
+    def __init__(self, root: Path, children: ChildrenGetter) -> None:
+        self._root = root
+        self._children = children
+        self._overrides: Dict[Path, bool] = {}
+        self._overrides_below: Dict[Path, int] = {}
+        self._checked_count = 0
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def is_checked(self, path: Path) -> bool:
+        for ancestor in self._self_and_ancestors(path):
+            value = self._overrides.get(ancestor)
+            if value is not None:
+                return value
+        return False
+
+    def state(self, path: Path) -> CheckState:
+        if self._overrides_below.get(path, 0) > 0:
+            return CheckState.PARTIALLY_CHECKED
+        return CheckState.CHECKED if self.is_checked(path) else CheckState.UNCHECKED
+
+    def is_anything_checked(self) -> bool:
+        return self._checked_count > 0
+
+    def set_checked(self, path: Path, value: bool) -> Path:
+        if not self._contains(path):
+            return path
+        self.forget(path)
+        parent_value = path != self._root and self.is_checked(path.parent)
+        if value != parent_value:
+            self._set_override(path, value)
+
+        if path != self._root:
+            siblings = self._children(path.parent)
+            expected = CheckState.CHECKED if value else CheckState.UNCHECKED
+            if siblings and all(self.state(sibling) == expected for sibling in siblings):
+                return self.set_checked(path.parent, value)
+        return path
+
+    def forget(self, path: Path) -> None:
+        if self._overrides_below.get(path, 0) > 0:
+            for overridden in [p for p in self._overrides if path in p.parents]:
+                self._remove_override(overridden)
+        if path in self._overrides:
+            self._remove_override(path)
+
+    def checked_paths(self) -> List[Path]:
+        ret: List[Path] = []
+        for path, value in self._overrides.items():
+            if value:
+                self._collect_checked(path, ret)
+        return sorted(ret, key=lambda path: path.parts)
+
+    def _collect_checked(self, path: Path, ret: List[Path]) -> None:
+        if self._overrides_below.get(path, 0) == 0:
+            ret.append(path)
+            return
+        for child in self._children(path) or []:
+            if child not in self._overrides:
+                self._collect_checked(child, ret)
+
+    def _set_override(self, path: Path, value: bool) -> None:
+        self._overrides[path] = value
+        self._checked_count += value
+        for ancestor in self._ancestors(path):
+            self._overrides_below[ancestor] = self._overrides_below.get(ancestor, 0) + 1
+
+    def _remove_override(self, path: Path) -> None:
+        self._checked_count -= self._overrides.pop(path)
+        for ancestor in self._ancestors(path):
+            count = self._overrides_below[ancestor] - 1
+            if count == 0:
+                del self._overrides_below[ancestor]
+            else:
+                self._overrides_below[ancestor] = count
+
+    def _contains(self, path: Path) -> bool:
+        return path == self._root or self._root in path.parents
+
+    def _ancestors(self, path: Path) -> Iterator[Path]:
+        while path != self._root:
+            path = path.parent
+            yield path
+
+    def _self_and_ancestors(self, path: Path) -> Iterator[Path]:
+        yield path
+        yield from self._ancestors(path)
@@ -4,11 +4,8 @@ import logging
 from dataclasses import dataclass
 from dataclasses import field
 from pathlib import Path
-from typing import Any
-from typing import Dict
 from typing import List
 from typing import Optional
-from typing import Type
 
 from enums import Direction
 from serializable import JSONSerializable
@@ -27,17 +24,12 @@ class Config(JSONSerializable):
                 logging.warning('Path %s does not exist', self.data_path)
                 self.data_path = None
 
-    @classmethod
-    def from_json(cls: Type[Config], json: Dict[str, Any]) -> Config:
-        data_path = json.get('data_path')
-        recent_files = json.get('recent_files', [])
-        direction = json.get('direction', Direction.LEFT_TO_RIGHT)
 
-        return Config(
-            Path(data_path) if data_path is not None else None,
-            [Path(file) for file in recent_files],
-            Direction(direction),
-        )
+_config: Optional[Config] = None
 
 
-CONFIG = Config.load(CONFIG_PATH)
+def get_config() -> Config:
+    global _config
+    if _config is None:
+        _config = Config.load(CONFIG_PATH)
+    return _config
@@ -1,4 +1,5 @@
-from pathlib import Path
+import functools
+import weakref
 from typing import Any
 from typing import Generic
 from typing import List
@@ -7,9 +8,13 @@ from typing import TypeVar
 import settings
 
 from PyQt5.QtCore import QElapsedTimer
+from PyQt5.QtCore import QObject
 from PyQt5.QtCore import Qt
 from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QHideEvent
 from PyQt5.QtGui import QIntValidator
+from PyQt5.QtGui import QShowEvent
+from PyQt5.QtWidgets import QApplication
 from PyQt5.QtWidgets import QDialog
 from PyQt5.QtWidgets import QGridLayout
 from PyQt5.QtWidgets import QLabel
@@ -18,8 +23,6 @@ from PyQt5.QtWidgets import QPushButton
 from PyQt5.QtWidgets import QRadioButton
 from PyQt5.QtWidgets import QSizePolicy
 from PyQt5.QtWidgets import QTextEdit
-from PyQt5.QtWidgets import QTreeWidget
-from PyQt5.QtWidgets import QTreeWidgetItem
 from PyQt5.QtWidgets import QVBoxLayout
 from PyQt5.QtWidgets import QWidget
 
@@ -27,36 +30,18 @@ from score import Score
 from utils import Timedelta
 
 
-def color_str(string, color=settings.DEFAULT_COLOR):
-    string = f'<span style="color:{color};">{string}</span>'
-    return string
-
-
-class TreeWidget(QTreeWidget):
-    def __init__(self, path: Path, *args, **kwargs) -> None:
-        super().__init__(*args, **kwargs)
-        self._path = path
-
-    @property
-    def path(self) -> Path:
-        return self._path
-
-    def set_path(self, path: Path) -> None:
-        self._path = path
+@functools.lru_cache(maxsize=None)
+def default_color() -> str:
+    if settings.DEFAULT_COLOR is not None:
+        return settings.DEFAULT_COLOR
+    import darkdetect
+    return 'white' if darkdetect.isDark() else 'black'
 
 
-class TreeWidgetItem(QTreeWidgetItem):
-    def __init__(self, path: Path, *args: Any, **kwargs: Any) -> None:
-        super().__init__(*args, **kwargs)
-        self._path = path
-
-    @property
-    def is_checked(self) -> bool:
-        return self.checkState(0) == Qt.Checked
-
-    @property
-    def path(self) -> Path:
-        return self._path
+def color_str(string, color=None):
+    color = color or default_color()
+    string = f'<span style="color:{color};">{string}</span>'
+    return string
 
 
 class CustomQTextEdit(QTextEdit):
@@ -84,35 +69,97 @@ class ScoreQLabel(QLabel):
     def add_incorrect(self):
         self.score.bad_ans()
 
+    def add_almost_correct(self):
+        self.score.almost_ans()
+
     def update(self):
-        self.setText('Correct: {}\nIncorrect: {}\nScore: {:.2f}%'.format(self.score.correct, self.score.incorrect, self.score.get_percentage()))
+        self.setText('Correct: {}\nAlmost: {}\nIncorrect: {}\nScore: {:.2f}%'.format(
+            self.score.correct - self.score.almost,
+            self.score.almost,
+            self.score.incorrect,
+            self.score.get_percentage(),
+        ))
 
     def clear(self):
         self.score.clear()
 
 
+# One timer drives every visible, running QElapsedTimerWidget and stops
+# when there is none left.
+class _Clock(QObject):
+    def __init__(self) -> None:
+        super().__init__()
+        self._widgets: 'weakref.WeakSet[QElapsedTimerWidget]' = weakref.WeakSet()
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._tick)
+
+    def subscribe(self, widget: 'QElapsedTimerWidget') -> None:
+        self._widgets.add(widget)
+        if not self._timer.isActive():
+            self._timer.start(self._interval())
+
+    def unsubscribe(self, widget: 'QElapsedTimerWidget') -> None:
+        self._widgets.discard(widget)
+        if len(self._widgets) == 0:
+            self._timer.stop()
+
+    def _tick(self) -> None:
+        for widget in list(self._widgets):
+            widget.refresh()
+        if len(self._widgets) == 0:
+            self._timer.stop()
+
+    @staticmethod
+    def _interval() -> int:
+        rate = settings.TIMER_REFRESH_RATE
+        if rate is None:
+            screen = QApplication.primaryScreen()
+            rate = screen.refreshRate() if screen is not None else 60
+        return max(1, round(1000 / rate))
+
+
+_clock: Optional[_Clock] = None
+
+
+def get_clock() -> _Clock:
+    global _clock
+    if _clock is None:
+        _clock = _Clock()
+    return _clock
+
+
 class QElapsedTimerWidget(QLabel):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._timer = QElapsedTimer()
         self._timer.start()
-        self._check_thread_timer = QTimer(self)
-        self._check_thread_timer.setInterval(1)  # .5 seconds
-        self._check_thread_timer.timeout.connect(self.update)
         self.stopped = True
 
     def start(self):
         self.stopped = False
         self._timer.start()
-        self.update()
+        self.refresh()
+        if self.isVisible():
+            get_clock().subscribe(self)
 
     def stop(self):
+        self.refresh()
         self.stopped = True
+        get_clock().unsubscribe(self)
 
-    def update(self):
+    def refresh(self):
         if not self.stopped:
             self.setText('{}m {}s {:03d}ms'.format(self.elapsed.minutes_, self.elapsed.seconds_, self.elapsed.milliseconds_))
-            self._check_thread_timer.start()
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super().showEvent(event)
+        if not self.stopped:
+            self.refresh()
+            get_clock().subscribe(self)
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        super().hideEvent(event)
+        get_clock().unsubscribe(self)
 
     @property
     def elapsed(self) -> Timedelta:
@@ -1,66 +1,135 @@
+import io
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from pathlib import Path
+from typing import Any
+from typing import Generator
+from typing import Iterable
 from typing import List
-
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QTreeWidget
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
 
 import settings
-from custom_widgets import TreeWidgetItem
+from deck_cache import get_deck_cache
+from deck_cache import Row
+from io_utils import expand_paths
+from io_utils import read_text
+from question import DeckStore
 from question import Question
-from utils import is_utf8
 
 
 class CouldNotLoadDatabaseException(Exception):
     pass
 
 
+def parse_file(path: Path) -> List[Row]:
+    text, _ = read_text(path, settings.ENCODING_DETECTION_PREFIX)
+    return parse_text(text, path)
+
+
+def parse_text(text: str, path: Path) -> List[Row]:
+    rows: List[Row] = []
+    for i, line in enumerate(io.StringIO(text, newline=None), start=1):
+        try:
+            if line in settings.IGNORED_LINES:
+                continue
+            if line.startswith(tuple(settings.COMMENT_CHARS)):
+                continue
+            question, answers = [
+                x.strip(' ')
+                for x in line.strip('\n').split(' - ')
+            ]
+
+            rows.append((
+                [question.strip() for question in question.split(',')],
+                [answer.strip() for answer in answers.split(',')],
+            ))
+        except ValueError as e:
+            logging.warning("{}:{} / Couldn't parse line:\n{}".format(path, i, line))
+    return rows
+
+
 class Database:
-    def __init__(self, tree_widget: QTreeWidget, *args, **kwargs) -> None:
-        self._questions: List[Question] = []
-        self._paths: List[Path] = []
-        root = tree_widget.invisibleRootItem()
-        self._load_directory_recursively(root)
-
-    def _load_directory_recursively(self, tree_item: TreeWidgetItem) -> None:
-        tree_item_status = tree_item.checkState(0)
-
-        if tree_item_status == Qt.Checked and tree_item.path.is_file():
-            encoding = (
-                settings.UTF8_ENCODING if is_utf8(tree_item.path)
-                else settings.WINDOWS_ENCODING
+    def __init__(
+            self,
+            paths: Iterable[Union[str, Path]],
+            *args: Any,
+            workers: Optional[int] = None,
+            executor: Optional[str] = None,
+            load: bool = True,
+            **kwargs: Any,
+    ) -> None:
+        self._questions: Union[List[Question], DeckStore] = DeckStore() if settings.COMPACT_DECKS else []
+        self._selected = list(paths)
+        self._paths: Optional[List[Path]] = None
+        self._workers = workers if workers is not None else settings.LOADER_WORKERS
+        self._executor = executor or settings.LOADER_EXECUTOR
+        if load:
+            for path, rows in self.iter_rows():
+                self.add_rows(path, rows)
+
+    def iter_rows(self) -> Generator[Tuple[Path, List[Row]], None, None]:
+        # files are read lazily in order, closing the iterator stops the rest
+        paths = self.paths
+        cache = get_deck_cache()
+        missing = [path for path in paths if not cache.contains(path, settings.WINDOWS_ENCODING)]
+        unparsed = set(missing)
+        try:
+            with closing(self._parse_files(missing)) as parsed:
+                for path in paths:
+                    rows = None if path in unparsed else cache.get(path, settings.WINDOWS_ENCODING)
+                    if rows is None:
+                        rows = next(parsed) if path in unparsed else parse_file(path)
+                        cache.put(path, settings.WINDOWS_ENCODING, rows)
+                    yield path, rows
+        finally:
+            if missing:
+                cache.prune()
+
+    def add_rows(self, path: Path, rows: List[Row]) -> None:
+        if isinstance(self._questions, DeckStore):
+            self._questions.extend_rows(rows, path.stem, path)
+        else:
+            self._questions.extend(
+                Question(question=question, answers=answers, category=path.stem, source=path)
+                for question, answers in rows
             )
-            self._paths.append(tree_item.path)
-            with open(tree_item.path, 'r', encoding=encoding) as f:
-                for i, line in enumerate(f):
-                    try:
-                        if line in settings.IGNORED_LINES:
-                            continue
-                        if line.startswith(tuple(settings.COMMENT_CHARS)):
-                            continue
-                        question, answers = [
-                            x.strip(' ')
-                            for x in line.strip('\n').split(' - ')
-                        ]
-
-                        self._questions.append(
-                            Question(
-                                question=[question.strip() for question in question.split(',')],
-                                answers=[answer.strip() for answer in answers.split(',')],
-                                category=tree_item.path.stem,
-                            ),
-                        )
-                    except ValueError as e:
-                        logging.warning("{}:{} / Couldn't parse line:\n{}".format(f.name, f.fileno(), line))
-
-        for i in range(tree_item.childCount()):
-            item = tree_item.child(i)
-            self._load_directory_recursively(item)
+
+    def _parse_files(self, paths: List[Path]) -> Generator[List[Row], None, None]:
+        if self._workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                yield parse_file(path)
+            return
+
+        executor_cls: Any = ThreadPoolExecutor
+        if self._executor == 'process':
+            # multiprocessing is slow to import, only load it when asked for
+            from concurrent.futures import ProcessPoolExecutor
+            executor_cls = ProcessPoolExecutor
+        executor = executor_cls(max_workers=self._workers)
+        futures = [executor.submit(parse_file, path) for path in paths]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
 
     @property
-    def questions(self) -> List[Question]:
+    def questions(self) -> Sequence[Question]:
         return self._questions
 
     @property
     def paths(self) -> List[Path]:
+        # expanded on first use, with load=False that is on the loader thread
+        if self._paths is None:
+            paths = expand_paths(self._selected)
+            for path in paths:
+                if not path.is_file():
+                    raise CouldNotLoadDatabaseException(f'{path} is not a file')
+            self._paths = paths
         return self._paths
@@ -0,0 +1,38 @@
+from contextlib import closing
+from typing import Optional
+
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QThread
+
+from database import CouldNotLoadDatabaseException
+from database import Database
+
+
+# Reads the files of a database created with load=False. Rows are handed
+# over per file and added to the database on the receiving (GUI) thread.
+class DatabaseLoader(QThread):
+    counted = pyqtSignal(int)
+    loaded = pyqtSignal(object, object)
+    progress = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, database: Database, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._database = database
+
+    @property
+    def database(self) -> Database:
+        return self._database
+
+    def run(self) -> None:
+        try:
+            self.counted.emit(len(self._database.paths))
+            with closing(self._database.iter_rows()) as rows_per_path:
+                for i, (path, rows) in enumerate(rows_per_path, start=1):
+                    self.loaded.emit(path, rows)
+                    self.progress.emit(i)
+                    if self.isInterruptionRequested():
+                        return
+        except (CouldNotLoadDatabaseException, OSError, ValueError) as e:
+            self.failed.emit(str(e))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import marshal
+import os
+import struct
+from pathlib import Path
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import settings
+
+
+Row = Tuple[List[str], List[str]]
+_Key = Tuple[int, int, str]
+# size of the marshalled header that follows
+_HEADER_SIZE = struct.Struct('<I')
+
+
+# One file per deck holding a (version, path, key) header and then the rows.
+# Nothing is kept in memory, entries are only read for the selected decks.
+class DeckCache:
+    VERSION = 2
+
+    def __init__(self, path: Path, max_entries: int = settings.DECK_CACHE_MAX_ENTRIES) -> None:
+        self._path = path
+        self._max_entries = max_entries
+
+    def contains(self, path: Path, encoding: str) -> bool:
+        try:
+            with open(self._entry_path(path), 'rb') as f:
+                header_size, = _HEADER_SIZE.unpack(f.read(_HEADER_SIZE.size))
+                return self._is_valid(f.read(header_size), path, encoding)
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+        except (OSError, EOFError, ValueError, TypeError, struct.error) as e:
+            logging.warning('Could not read deck cache entry of %s: %s', path, e)
+            return False
+
+    def get(self, path: Path, encoding: str) -> Optional[List[Row]]:
+        entry_path = self._entry_path(path)
+        try:
+            with open(entry_path, 'rb') as f:
+                data = f.read()
+            header_size, = _HEADER_SIZE.unpack_from(data)
+            rows_start = _HEADER_SIZE.size + header_size
+            if not self._is_valid(data[_HEADER_SIZE.size:rows_start], path, encoding):
+                return None
+            rows = marshal.loads(memoryview(data)[rows_start:])
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        except (OSError, EOFError, ValueError, TypeError, struct.error) as e:
+            logging.warning('Could not read deck cache entry of %s: %s', path, e)
+            return None
+        # prune() removes the entries with the oldest modification time first
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return rows
+
+    def put(self, path: Path, encoding: str, rows: List[Row]) -> None:
+        try:
+            key = self._key(path, encoding)
+        except OSError:
+            return
+        header = marshal.dumps((self.VERSION, str(path), key))
+        entry_path = self._entry_path(path)
+        tmp_path = entry_path.with_name(entry_path.name + '.tmp')
+        try:
+            self._make_dir()
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER_SIZE.pack(len(header)))
+                f.write(header)
+                marshal.dump(rows, f)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logging.warning('Could not write deck cache entry of %s: %s', path, e)
+
+    def invalidate(self, path: Path) -> None:
+        # entries of files inside a removed directory no longer match and are pruned eventually
+        try:
+            self._entry_path(path).unlink()
+        except OSError:
+            pass
+
+    def prune(self) -> None:
+        try:
+            with os.scandir(self._path) as it:
+                entries = sorted((entry.stat().st_mtime_ns, entry.path) for entry in it)
+        except OSError:
+            return
+        for _, entry_path in entries[:max(len(entries) - self._max_entries, 0)]:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+    def _entry_path(self, path: Path) -> Path:
+        return self._path.joinpath(hashlib.blake2b(str(path).encode('utf-8'), digest_size=16).hexdigest())
+
+    def _is_valid(self, header: bytes, path: Path, encoding: str) -> bool:
+        try:
+            key = self._key(path, encoding)
+        except OSError:
+            return False
+        return marshal.loads(header) == (self.VERSION, str(path), key)
+
+    def _make_dir(self) -> None:
+        try:
+            self._path.mkdir(exist_ok=True)
+        except FileExistsError:
+            # single file cache written by an older version
+            self._path.unlink()
+            self._path.mkdir()
+
+    @staticmethod
+    def _key(path: Path, encoding: str) -> _Key:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size, encoding)
+
+
+_deck_cache: Optional[DeckCache] = None
+
+
+def get_deck_cache() -> DeckCache:
+    global _deck_cache
+    if _deck_cache is None:
+        _deck_cache = DeckCache(settings.DECK_CACHE_PATH)
+    return _deck_cache
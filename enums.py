@@ -4,9 +4,29 @@ from enum import Enum
 class Order(Enum):
     SEQUENTIAL = 'sequential'
     RANDOM = 'random'
+    SPACED = 'spaced'
+    WEIGHTED = 'weighted'
 
 
 class Direction(Enum):
     LEFT_TO_RIGHT = 0
     RIGHT_TO_LEFT = 1
     RANDOM = 2
+
+
+class CheckState(Enum):
+    UNCHECKED = 0
+    PARTIALLY_CHECKED = 1
+    CHECKED = 2
+
+
+class Grade(Enum):
+    CORRECT = 'correct'
+    ALMOST_CORRECT = 'almost_correct'
+    INCORRECT = 'incorrect'
+
+
+class Resolution(Enum):
+    ENTRY = 'entry'
+    DAY = 'day'
+    WEEK = 'week'
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import struct
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import settings
+from enums import Direction
+from enums import Grade
+from question import Question
+
+
+# timestamp, question id, source id, response time in ms, direction, grade
+_RECORD = struct.Struct('<dQIIBB2x')
+# numpy dtype of a single record, to be used with np.fromfile
+DTYPE = [
+    ('timestamp', '<f8'),
+    ('question_id', '<u8'),
+    ('source_id', '<u4'),
+    ('response_ms', '<u4'),
+    ('direction', 'u1'),
+    ('grade', 'u1'),
+    ('', 'V2'),
+]
+NO_SOURCE = 0xFFFFFFFF
+MAX_RESPONSE_MS = 0xFFFFFFFF
+GRADES = {
+    Grade.CORRECT: 0,
+    Grade.ALMOST_CORRECT: 1,
+    Grade.INCORRECT: 2,
+}
+
+
+def question_id(question: Question) -> int:
+    digest = hashlib.blake2b(question.key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class EventLog:
+    def __init__(self, path: Path, sources_path: Path) -> None:
+        self._path = path
+        self._sources_path = sources_path
+        self._sources: Optional[List[Path]] = None
+        self._source_ids: Dict[Path, int] = {}
+
+    @property
+    def sources(self) -> List[Path]:
+        if self._sources is None:
+            self._load_sources()
+        assert self._sources is not None
+        return self._sources
+
+    def source_id(self, path: Optional[Path]) -> int:
+        if path is None:
+            return NO_SOURCE
+        sources = self.sources
+        source_id = self._source_ids.get(path)
+        if source_id is None:
+            source_id = len(sources)
+            with open(self._sources_path, 'a') as f:
+                f.write(f'{path}\n')
+            sources.append(path)
+            self._source_ids[path] = source_id
+        return source_id
+
+    def record(
+            self,
+            question: Question,
+            direction: Direction,
+            grade: Grade,
+            response_time: timedelta,
+            timestamp: Optional[datetime] = None,
+    ) -> None:
+        timestamp = timestamp or datetime.now()
+        response_ms = min(int(response_time.total_seconds() * 1000), MAX_RESPONSE_MS)
+        record = _RECORD.pack(
+            timestamp.timestamp(),
+            question_id(question),
+            self.source_id(question.source),
+            response_ms,
+            direction.value,
+            GRADES[grade],
+        )
+        try:
+            with open(self._path, 'ab') as f:
+                f.write(record)
+        except OSError as e:
+            logging.warning('Could not write event to %s: %s', self._path, e)
+
+    def load_array(self) -> Any:
+        import numpy as np
+
+        try:
+            size = self._path.stat().st_size
+        except FileNotFoundError:
+            return np.empty(0, dtype=DTYPE)
+        # a torn write leaves a partial record at the end, skip it
+        return np.fromfile(self._path, dtype=DTYPE, count=size // _RECORD.size)
+
+    def _load_sources(self) -> None:
+        try:
+            with open(self._sources_path) as f:
+                self._sources = [Path(line.rstrip('\n')) for line in f]
+        except FileNotFoundError:
+            self._sources = []
+        self._source_ids = {path: i for i, path in enumerate(self._sources)}
+
+
+EVENTS = EventLog(settings.EVENTS_PATH, settings.EVENTS_SOURCES_PATH)
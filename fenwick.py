@@ -0,0 +1,60 @@
+from typing import Iterable
+from typing import List
+
+
+class FenwickTree:
+    def __init__(self, weights: Iterable[float]) -> None:
+        self._weights: List[float] = list(weights)
+        self._tree: List[float] = [0.0] + self._weights
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    @property
+    def total(self) -> float:
+        return self.prefix_sum(len(self._weights))
+
+    def weight(self, index: int) -> float:
+        return self._weights[index]
+
+    def append(self, weight: float) -> None:
+        self._weights.append(weight)
+        # node i sums the weights in (i - lowbit(i), i], gather its children
+        i = len(self._weights)
+        value = weight
+        step = 1
+        while step < (i & -i):
+            value += self._tree[i - step]
+            step <<= 1
+        self._tree.append(value)
+
+    def update(self, index: int, weight: float) -> None:
+        delta = weight - self._weights[index]
+        self._weights[index] = weight
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count: int) -> float:
+        ret = 0.0
+        while count > 0:
+            ret += self._tree[count]
+            count -= count & -count
+        return ret
+
+    def find(self, value: float) -> int:
+        # index of the first element whose running sum exceeds value
+        position = 0
+        step = 1 << (len(self._weights).bit_length())
+        while step > 0:
+            next_position = position + step
+            if next_position < len(self._tree) and self._tree[next_position] <= value:
+                position = next_position
+                value -= self._tree[next_position]
+            step >>= 1
+        return min(position, len(self._weights) - 1)
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtCore import QAbstractItemModel
+from PyQt5.QtCore import QFileSystemWatcher
+from PyQt5.QtCore import QModelIndex
+from PyQt5.QtCore import QObject
+from PyQt5.QtCore import Qt
+
+import settings
+from check_tree import CheckTree
+from enums import CheckState
+
+
+_QT_CHECK_STATES = {
+    CheckState.UNCHECKED: Qt.Unchecked,
+    CheckState.PARTIALLY_CHECKED: Qt.PartiallyChecked,
+    CheckState.CHECKED: Qt.Checked,
+}
+
+
+def scan_directory(path: Path) -> List[os.DirEntry]:
+    with os.scandir(path) as it:
+        return sorted(
+            (
+                entry for entry in it
+                if entry.is_dir() or not entry.name.endswith(tuple(settings.EXCLUDED_EXTENSIONS))
+            ),
+            key=lambda entry: entry.name,
+        )
+
+
+class _Node:
+    __slots__ = ('path', 'name', 'is_dir', 'parent', 'children', 'row')
+
+    def __init__(self, path: Path, is_dir: bool, parent: Optional[_Node], row: int) -> None:
+        self.path = path
+        self.name = path.name
+        self.is_dir = is_dir
+        self.parent = parent
+        self.children: Optional[List[_Node]] = None
+        self.row = row
+
+
+class FileTreeModel(QAbstractItemModel):
+    pathRemoved = pyqtSignal(object)
+
+    def __init__(self, root_path: Path, checked: Iterable[Path] = (), parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._set_root(root_path, checked)
+
+    @property
+    def root_path(self) -> Path:
+        return self._root.path
+
+    def reset(self, root_path: Path, checked: Iterable[Path] = ()) -> None:
+        self.beginResetModel()
+        if len(self._watcher.directories()) > 0:
+            self._watcher.removePaths(self._watcher.directories())
+        self._set_root(root_path, checked)
+        self.endResetModel()
+
+    def set_checked(self, path: Path, value: bool) -> None:
+        changed = self._check_tree.set_checked(path, value)
+        self._emit_check_state_changed(changed)
+
+    def checked_paths(self) -> List[Path]:
+        return self._check_tree.checked_paths()
+
+    def is_anything_checked(self) -> bool:
+        return self._check_tree.is_anything_checked()
+
+    def sync(self) -> None:
+        for node in list(self._dirs.values()):
+            if self._dirs.get(node.path) is node:
+                self._sync(node)
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        node = self._node(parent)
+        assert node.children is not None
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:  # type: ignore[override]
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        children = self._node(parent).children
+        return len(children) if children is not None else 0
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        node = self._node(parent)
+        if node.children is None:
+            return node.is_dir
+        return len(node.children) > 0
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        node = self._node(parent)
+        return node.is_dir and node.children is None
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        node = self._node(parent)
+        try:
+            entries = scan_directory(node.path)
+        except OSError:
+            entries = []
+        if len(entries) == 0:
+            self._load(node, entries)
+            return
+        self.beginInsertRows(parent, 0, len(entries) - 1)
+        self._load(node, entries)
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return node.name
+        if role == Qt.CheckStateRole:
+            return _QT_CHECK_STATES[self._check_tree.state(node.path)]
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        self.set_checked(index.internalPointer().path, value == Qt.Checked)
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def _set_root(self, root_path: Path, checked: Iterable[Path]) -> None:
+        self._root = _Node(root_path, True, None, 0)
+        self._dirs: Dict[Path, _Node] = {}
+        self._check_tree = CheckTree(root_path, self._children_paths)
+        for path in checked:
+            if path.exists():
+                self._check_tree.set_checked(path, True)
+        try:
+            self._load(self._root, scan_directory(root_path))
+        except OSError:
+            self._load(self._root, [])
+
+    def _load(self, node: _Node, entries: List[os.DirEntry]) -> None:
+        node.children = [
+            _Node(node.path.joinpath(entry.name), entry.is_dir(), node, row)
+            for row, entry in enumerate(entries)
+        ]
+        self._dirs[node.path] = node
+        if settings.WATCH_FILE_TREE:
+            self._watcher.addPath(str(node.path))
+
+    def _node(self, index: QModelIndex) -> _Node:
+        if index.isValid():
+            return index.internalPointer()
+        return self._root
+
+    def _index_of(self, node: _Node) -> QModelIndex:
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def _children_paths(self, path: Path) -> Optional[List[Path]]:
+        node = self._dirs.get(path)
+        if node is None or node.children is None:
+            return None
+        return [child.path for child in node.children]
+
+    def _emit_check_state_changed(self, path: Path) -> None:
+        dirs: Set[Path] = set()
+        for ancestor in path.parents:
+            dirs.add(ancestor)
+            if ancestor == self._root.path:
+                break
+        dirs.update(
+            dir_path for dir_path in self._dirs
+            if dir_path == path or path in dir_path.parents
+        )
+
+        for dir_path in dirs:
+            node = self._dirs.get(dir_path)
+            if node is None or not node.children:
+                continue
+            parent = self._index_of(node)
+            self.dataChanged.emit(
+                self.index(0, 0, parent),
+                self.index(len(node.children) - 1, 0, parent),
+                [Qt.CheckStateRole],
+            )
+
+    def _on_directory_changed(self, path: str) -> None:
+        node = self._dirs.get(Path(path))
+        if node is not None:
+            self._sync(node)
+
+    def _sync(self, node: _Node) -> None:
+        assert node.children is not None
+        try:
+            entries = scan_directory(node.path)
+        except OSError:
+            return
+
+        parent = self._index_of(node)
+        names = {entry.name for entry in entries}
+        for row in reversed(range(len(node.children))):
+            child = node.children[row]
+            if child.name not in names:
+                self.beginRemoveRows(parent, row, row)
+                del node.children[row]
+                self._renumber(node, row)
+                self.endRemoveRows()
+                self._forget(child)
+
+        existing = {child.name for child in node.children}
+        for row, entry in enumerate(entries):
+            if entry.name not in existing:
+                self.beginInsertRows(parent, row, row)
+                node.children.insert(row, _Node(node.path.joinpath(entry.name), entry.is_dir(), node, row))
+                self._renumber(node, row)
+                self.endInsertRows()
+
+    def _forget(self, node: _Node) -> None:
+        self._check_tree.forget(node.path)
+        self._unwatch(node)
+        self.pathRemoved.emit(node.path)
+
+    def _unwatch(self, node: _Node) -> None:
+        if self._dirs.pop(node.path, None) is not None:
+            self._watcher.removePath(str(node.path))
+            for child in node.children or []:
+                self._unwatch(child)
+
+    @staticmethod
+    def _renumber(node: _Node, start: int) -> None:
+        assert node.children is not None
+        for row in range(start, len(node.children)):
+            node.children[row].row = row
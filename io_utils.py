@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import codecs
+import glob
+import os
+from pathlib import Path
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import settings
+
+
+def detect_encoding(data: bytes, prefix_size: Optional[int] = None) -> str:
+    decoder = codecs.getincrementaldecoder(settings.UTF8_ENCODING)()
+    try:
+        if prefix_size is None:
+            decoder.decode(data, final=True)
+        else:
+            decoder.decode(data[:prefix_size], final=len(data) <= prefix_size)
+        return settings.UTF8_ENCODING
+    except UnicodeDecodeError:
+        return settings.WINDOWS_ENCODING
+
+
+def decode_text(data: bytes, prefix_size: Optional[int] = None) -> Tuple[str, str]:
+    if prefix_size is None:
+        try:
+            return data.decode(settings.UTF8_ENCODING), settings.UTF8_ENCODING
+        except UnicodeDecodeError:
+            return data.decode(settings.WINDOWS_ENCODING, errors='replace'), settings.WINDOWS_ENCODING
+
+    encoding = detect_encoding(data, prefix_size)
+    return data.decode(encoding, errors='replace'), encoding
+
+
+def read_text(filename: str | Path, prefix_size: Optional[int] = None) -> Tuple[str, str]:
+    with open(filename, 'rb') as f:
+        data = f.read()
+    return decode_text(data, prefix_size)
+
+
+def walk_files(path: Path) -> Iterator[Path]:
+    if not path.is_dir():
+        yield path
+        return
+    for filename in sorted(os.listdir(path)):
+        file_path = path.joinpath(filename)
+        if file_path.is_dir():
+            yield from walk_files(file_path)
+        elif not filename.endswith(tuple(settings.EXCLUDED_EXTENSIONS)):
+            yield file_path
+
+
+def expand_paths(patterns: Iterable[str | Path]) -> List[Path]:
+    ret: List[Path] = []
+    seen: Set[Path] = set()
+    for pattern in patterns:
+        if glob.has_magic(str(pattern)):
+            matches = [Path(match) for match in sorted(glob.glob(str(pattern), recursive=True))]
+        else:
+            matches = [Path(pattern)]
+
+        for match in matches:
+            for path in walk_files(match):
+                if path not in seen:
+                    seen.add(path)
+                    ret.append(path)
+    return ret
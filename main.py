@@ -1,45 +1,45 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import os
 import signal
+import threading
 from pathlib import Path
-from stat import S_ISDIR
-from stat import S_ISREG
-from stat import ST_MODE
+from typing import Any
 from typing import List
-from typing import Union
+from typing import Optional
+from typing import Tuple
 
 from PyQt5.QtCore import QEvent
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtWidgets import QFileDialog
 from PyQt5.QtWidgets import QGridLayout
 from PyQt5.QtWidgets import QHBoxLayout
+from PyQt5.QtWidgets import QProgressDialog
 from PyQt5.QtWidgets import QPushButton
-from PyQt5.QtWidgets import QRadioButton
 from PyQt5.QtWidgets import QStackedLayout
-from PyQt5.QtWidgets import QTreeWidgetItem
+from PyQt5.QtWidgets import QTreeView
 from PyQt5.QtWidgets import QVBoxLayout
 from PyQt5.QtWidgets import QWidget
 
 import settings
-from config import CONFIG
+from config import get_config
 from custom_widgets import HeightFillerWidget
 from custom_widgets import Label
 from custom_widgets import QInfoDialog
 from custom_widgets import QQuestionRange
 from custom_widgets import RadioGroupWidget
-from custom_widgets import TreeWidget
-from custom_widgets import TreeWidgetItem
 from custom_widgets import ValueRadioButton
 from database import Database
+from database_loader import DatabaseLoader
+from deck_cache import get_deck_cache
+from deck_cache import Row
 from enums import Direction
 from enums import Order
-from quiz_window import QuizWidget
+from file_tree import FileTreeModel
+from io_utils import expand_paths
+from schedule import save_schedule
 from settings import CONFIG_PATH
-from settings import STATS_PATH
-from stats import STATS
-from stats_window import StatsWindow
+from stats import get_stats
 from utils import group_widgets
 from utils import move_to_screen
 
@@ -51,17 +51,32 @@ class App(QWidget):
     def __init__(self) -> None:
         super().__init__()
         self.title = "Simple tester"
-        self._current_path = Label(str(CONFIG.data_path or ''), max_height=10)
+        self._current_path = Label(str(get_config().data_path or ''), max_height=10)
+        self._loader: Optional[DatabaseLoader] = None
+        self._progress: Optional[QProgressDialog] = None
+        self._loading_failed = False
+        self._quiz_widget: Any = None
+        self._test_options: Tuple[Order, Optional[slice], Direction] = (Order.RANDOM, None, Direction.LEFT_TO_RIGHT)
 
         self.initUI()
+        QTimer.singleShot(0, self._preload_stats)
 
     def initUI(self) -> None:
         self.setWindowTitle(self.title)
         self.setGeometry(*settings.WINDOW_GEOMETRY)
         if not settings.WINDOW_RESIZABLE:
             self.setFixedSize(self.size())
-        self.tree = TreeWidget(path=CONFIG.data_path or settings.ROOT_PATH)
-        self.tree.headerItem().setHidden(True)
+        config = get_config()
+        self.tree_model = FileTreeModel(config.data_path or settings.ROOT_PATH, config.recent_files, parent=self)
+        self.tree_model.pathRemoved.connect(self._on_path_removed)
+        self.tree = QTreeView()
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setModel(self.tree_model)
+        self._poll_timer = QTimer(self)
+        self._poll_timer.timeout.connect(self.tree_model.sync)
+        if settings.FILE_TREE_POLL_INTERVAL is not None:
+            self._poll_timer.start(settings.FILE_TREE_POLL_INTERVAL)
         self._no_data_path_widget = Label('Select data dir')
 
         # init layout and create widgets
@@ -69,7 +84,6 @@ class App(QWidget):
         vbox = QVBoxLayout()
         self._main_vbox = vbox
         right_column = QVBoxLayout()
-        self.fill_tree_view(self.tree)
 
         # add stuff
         b_select_all = QPushButton('All')
@@ -81,9 +95,6 @@ class App(QWidget):
         b_change_dir = QPushButton('Change dir')
         b_change_dir.clicked.connect(self.change_dir)
 
-        self.r_shuffled = QRadioButton('shuffled')
-        self.r_shuffled.setChecked(True)
-
         b_start_test = QPushButton('Start test')
         b_start_test.clicked.connect(self.generate_test)
         b_stats = QPushButton('Show stats')
@@ -93,7 +104,7 @@ class App(QWidget):
 
         # append
         vbox.addWidget(self._current_path)
-        vbox.addWidget(self.tree if CONFIG.data_path is not None else self._no_data_path_widget)
+        vbox.addWidget(self.tree if config.data_path is not None else self._no_data_path_widget)
 
         tree_view_buttons_layout = QGridLayout()
         tree_view_buttons_layout.addWidget(b_select_all, 0, 0)
@@ -116,12 +127,18 @@ class App(QWidget):
         right_column.addWidget(
             self.range_gb,
         )
+        self._order_radio_group = RadioGroupWidget(
+            widgets=[
+                ValueRadioButton(Order.SEQUENTIAL, 'sequential'),
+                ValueRadioButton(Order.RANDOM, 'shuffled'),
+                ValueRadioButton(Order.SPACED, 'spaced'),
+                ValueRadioButton(Order.WEIGHTED, 'mistakes first'),
+            ],
+            default=Order.RANDOM,
+        )
         right_column.addWidget(
             group_widgets(
-                *[
-                    QRadioButton('sequential'),
-                    self.r_shuffled,
-                ],
+                *self._order_radio_group.widgets,
                 title='question order',
                 kwargs={
                     'max_width': 150,
@@ -134,7 +151,7 @@ class App(QWidget):
                 ValueRadioButton(Direction.RIGHT_TO_LEFT, 'right ⟶ left'),
                 ValueRadioButton(Direction.RANDOM, 'random'),
             ],
-            default=CONFIG.direction,
+            default=get_config().direction,
         )
         right_column.addWidget(
             group_widgets(
@@ -160,103 +177,130 @@ class App(QWidget):
         self.show()
 
     def generate_test(self) -> None:
-        if not self._is_anything_checked(self.tree.invisibleRootItem()):
+        if not self.tree_model.is_anything_checked():
             QInfoDialog(text='You have to select at least one file', parent=self).exec_()
             return None
+        if self._loader is not None and self._loader.isRunning():
+            QInfoDialog(text='Questions are still being loaded', parent=self).exec_()
+            return None
+
+        database = Database(self.tree_model.checked_paths(), load=False)
+        self._test_options = (
+            self._order_radio_group.selected.value,
+            self.range_widget.get_range() if self.range_gb.isChecked() else None,
+            self._direction_radio_group.selected.value,
+        )
+        self._quiz_widget = None
+        self._loading_failed = False
+
+        loader = DatabaseLoader(database, parent=self)
+        loader.loaded.connect(self._on_questions_loaded)
+        loader.failed.connect(self._on_loading_failed)
+        loader.finished.connect(self._on_loading_finished)
+        # busy until the loader has expanded the selection, reset once loading finishes
+        progress = QProgressDialog('Loading questions...', 'Cancel', 0, 0, self)
+        progress.setAutoReset(False)
+        progress.setWindowTitle(self.title)
+        progress.setMinimumDuration(settings.LOADER_PROGRESS_DELAY)
+        progress.canceled.connect(loader.requestInterruption)
+        loader.counted.connect(progress.setMaximum)
+        loader.progress.connect(progress.setValue)
+        progress.setValue(0)
+        self._loader = loader
+        self._progress = progress
+        loader.start()
+
+    def _on_questions_loaded(self, path: Path, rows: List[Row]) -> None:
+        assert self._loader is not None
+        database = self._loader.database
+        database.add_rows(path, rows)
+        if self._quiz_widget is not None:
+            self._quiz_widget.questions_added()
+            return
 
-        database = Database(self.tree)
+        # a range or due questions can only be picked from the whole selection
+        order, range, _ = self._test_options
+        if range is None and order != Order.SPACED and len(database.questions) > 0:
+            self._open_quiz(database, loading=True)
+
+    def _on_loading_failed(self, error: str) -> None:
+        self._loading_failed = True
+        QInfoDialog(text=f'Could not load questions: {error}', parent=self).exec_()
+
+    def _on_loading_finished(self) -> None:
+        assert self._loader is not None and self._progress is not None
+        database = self._loader.database
+        interrupted = self._loader.isInterruptionRequested()
+        self._progress.reset()
+        # both have the App as parent, which would keep them and the database alive
+        self._loader.deleteLater()
+        self._progress.deleteLater()
+        self._loader = None
+        self._progress = None
+
+        if self._quiz_widget is not None:
+            self._quiz_widget.loading_finished()
+            return
+        if interrupted or self._loading_failed:
+            return
         if len(database.questions) == 0:
             QInfoDialog(text='No questions found in selected files', parent=self).exec_()
-            return None
+            return
+        self._open_quiz(database, loading=False)
 
-        order = Order.RANDOM if self.r_shuffled.isChecked() else Order.SEQUENTIAL
-        range = self.range_widget.get_range() if self.range_gb.isChecked() else None
-        QuizWidget(database, order, range=range, direction=self._direction_radio_group.selected.value)
-
-    def fill_tree_view(self, tree: Union[TreeWidget, TreeWidgetItem]) -> None:
-        directory = os.fsencode(tree.path)
-        for file in sorted(os.listdir(directory)):
-            filename = os.fsdecode(file)
-            file_path = tree.path.joinpath(filename)
-            mode = os.stat(file_path)[ST_MODE]
-
-            if S_ISREG(mode) and filename.endswith(tuple(settings.EXCLUDED_EXTENSIONS)):
-                continue
-
-            new_item = TreeWidgetItem(file_path, tree)
-            new_item.setText(0, filename)
-            new_item.setFlags(new_item.flags() | Qt.ItemIsTristate | Qt.ItemIsUserCheckable)
-            if file_path in CONFIG.recent_files:
-                new_item.setCheckState(0, Qt.Checked)
-            else:
-                new_item.setCheckState(0, Qt.Unchecked)
-            if S_ISDIR(mode):
-                self.fill_tree_view(new_item)
+    def _open_quiz(self, database: Database, loading: bool) -> None:
+        from quiz_window import QuizWidget
+        order, range, direction = self._test_options
+        self._quiz_widget = QuizWidget(database, order, range=range, direction=direction, loading=loading)
 
     def select_all(self) -> None:
-        self.check_subtree(self.tree.invisibleRootItem(), Qt.Checked)
+        self.tree_model.set_checked(self.tree_model.root_path, True)
 
     def select_none(self) -> None:
-        self.check_subtree(self.tree.invisibleRootItem(), Qt.Unchecked)
+        self.tree_model.set_checked(self.tree_model.root_path, False)
 
     def refresh_file_tree(self) -> None:
-        CONFIG.recent_files = self._get_checked(self.tree.invisibleRootItem())
-        self.tree.clear()
-        self.fill_tree_view(self.tree)
+        self.tree_model.sync()
+
+    def _on_path_removed(self, path: Path) -> None:
+        get_deck_cache().invalidate(path)
 
     def change_dir(self) -> None:
         data_dir = QFileDialog.getExistingDirectory(parent=self, caption='Select a folder:', directory=".")
         if data_dir != '':
             data_dir = Path(data_dir)
             self._current_path.setText(str(data_dir))
-            if CONFIG.data_path is None:
+            config = get_config()
+            if config.data_path is None:
                 self._main_vbox.removeWidget(self._no_data_path_widget)
                 self._main_vbox.insertWidget(1, self.tree)
-            self.tree.set_path(data_dir)
-            self.refresh_file_tree()
-            CONFIG.data_path = data_dir
-
-    def check_subtree(self, tree_item: QTreeWidgetItem, state: Qt.CheckState) -> None:
-        tree_item.setCheckState(0, state)
-        for i in range(tree_item.childCount()):
-            tree_item.child(i).setCheckState(0, state)
-
-    def _is_anything_checked(self, tree_item: QTreeWidgetItem) -> bool:
-        count = 0
-        for i in range(tree_item.childCount()):
-            if tree_item.child(i).checkState(0) in (Qt.Checked, Qt.PartiallyChecked):
-                count += 1
-        return count != 0
-
-    def _get_checked(self, tree_item: TreeWidgetItem) -> List[Path]:
-        ret = []
-
-        for i in range(tree_item.childCount()):
-            item = tree_item.child(i)
-            if item.path.is_file():
-                if item.checkState(0) == Qt.Checked:
-                    ret.append(item.path)
-            else:
-                if item.checkState(0) != Qt.Unchecked:
-                    ret.extend(self._get_checked(item))
-        return ret
+            config.recent_files = self.tree_model.checked_paths()
+            self.tree_model.reset(data_dir, config.recent_files)
+            config.data_path = data_dir
 
     def show_stats(self) -> None:
-        selected = self._get_checked(self.tree.invisibleRootItem())
+        selected = expand_paths(self.tree_model.checked_paths())
         if len(selected) == 0:
             QInfoDialog(text='You have to select at least one file', parent=self).exec_()
             return
-        if len(STATS.get_entries_for_paths(selected)) == 0:
+        entries = get_stats().get_entries_for_paths(selected)
+        if len(entries) == 0:
             QInfoDialog(text='No data to show for selected entries', parent=self).exec_()
             return
 
-        self._w = StatsWindow(selected)
+        # pulls in pyqtgraph and numpy, most sessions never open it
+        from stats_window import StatsWindow
+        self._w = StatsWindow(selected, entries)
+
+    def _preload_stats(self) -> None:
+        threading.Thread(target=get_stats, daemon=True).start()
 
     def closeEvent(self, event: QEvent) -> None:
-        CONFIG.recent_files = self._get_checked(self.tree.invisibleRootItem())
-        CONFIG.direction = self._direction_radio_group.selected.value
-        CONFIG.dump(CONFIG_PATH)
-        STATS.dump(STATS_PATH)
+        config = get_config()
+        config.recent_files = self.tree_model.checked_paths()
+        config.direction = self._direction_radio_group.selected.value
+        config.dump(CONFIG_PATH)
+        save_schedule()
         event.accept()
 
 
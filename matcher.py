@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Callable
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+import settings
+from enums import Grade
+
+
+_PARENTHESES_RE = re.compile(r' ?\(\w+\)')
+_FOLDED_LETTERS = str.maketrans({
+    'ł': 'l',
+    'Ł': 'L',
+    'ß': 'ss',
+    'ẞ': 'SS',
+})
+
+
+def get_parenless(expression: str) -> str:
+    return _PARENTHESES_RE.sub('', expression)
+
+
+def fold_diacritics(expression: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', expression.translate(_FOLDED_LETTERS))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _build_normalizer() -> Callable[[str], str]:
+    steps: List[Callable[[str], str]] = []
+    if settings.ANSWER_NORMALIZE_WHITESPACE:
+        steps.append(lambda expression: ' '.join(expression.split()))
+    if settings.ANSWER_UNICODE_FORM is not None:
+        form = settings.ANSWER_UNICODE_FORM
+        steps.append(lambda expression: unicodedata.normalize(form, expression))
+    if settings.ANSWER_FOLD_DIACRITICS:
+        steps.append(fold_diacritics)
+    if not settings.ANSWER_CASE_SENSITIVE:
+        steps.append(str.casefold)
+
+    if len(steps) == 0:
+        return lambda expression: expression
+
+    def normalize(expression: str) -> str:
+        for step in steps:
+            expression = step(expression)
+        return expression
+    return normalize
+
+
+normalize_answer = _build_normalizer()
+
+
+def max_distance(length: int) -> int:
+    for max_length, distance in settings.FUZZY_MAX_DISTANCE:
+        if max_length is None or length <= max_length:
+            return distance
+    return 0
+
+
+class _Pattern:
+    __slots__ = ('_peq', '_length', '_max_distance')
+
+    def __init__(self, pattern: str) -> None:
+        self._peq: Dict[str, int] = {}
+        for i, char in enumerate(pattern):
+            self._peq[char] = self._peq.get(char, 0) | (1 << i)
+        self._length = len(pattern)
+        self._max_distance = max_distance(len(pattern))
+
+    def is_within_distance(self, text: str) -> bool:
+        if self._max_distance == 0 or abs(len(text) - self._length) > self._max_distance:
+            return False
+        return self.distance(text, self._max_distance) <= self._max_distance
+
+    def distance(self, text: str, limit: int) -> int:
+        # Myers' bit-parallel edit distance, stops once limit can't be met
+        m = self._length
+        if m == 0:
+            return len(text)
+        mask = (1 << m) - 1
+        high = 1 << (m - 1)
+        pv = mask
+        mv = 0
+        score = m
+        remaining = len(text)
+        for char in text:
+            remaining -= 1
+            eq = self._peq.get(char, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & mask)
+            mh = pv & xh
+            if ph & high:
+                score += 1
+            elif mh & high:
+                score -= 1
+            if score - remaining > limit:
+                return score - remaining
+            ph = ((ph << 1) | 1) & mask
+            mh = (mh << 1) & mask
+            pv = mh | (~(xv | ph) & mask)
+            mv = ph & xv
+        return score
+
+
+class Matcher:
+    __slots__ = ('_accepted', '_patterns')
+
+    def __init__(self, answers: Iterable[str]) -> None:
+        self._accepted: FrozenSet[str] = frozenset(
+            normalize_answer(get_parenless(answer)) for answer in answers
+        )
+        self._patterns: Tuple[_Pattern, ...] = (
+            tuple(_Pattern(answer) for answer in self._accepted)
+            if settings.FUZZY_MATCHING else ()
+        )
+
+    def matches(self, answer: str) -> bool:
+        return normalize_answer(answer) in self._accepted
+
+    def grade(self, answer: str) -> Grade:
+        normalized = normalize_answer(answer)
+        if normalized in self._accepted:
+            return Grade.CORRECT
+        if any(pattern.is_within_distance(normalized) for pattern in self._patterns):
+            return Grade.ALMOST_CORRECT
+        return Grade.INCORRECT
@@ -1,17 +1,43 @@
 from __future__ import annotations
 
-import re
+import sys
+from array import array
+from bisect import bisect_right
+from pathlib import Path
 from typing import Any
+from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import Optional
+from typing import overload
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from enums import Grade
+from matcher import get_parenless
+from matcher import Matcher
 
 
 class Question:
-    def __init__(self, question: List[str], answers: List[str], category: Optional[str] = None, **kwargs: Any) -> None:
+    __slots__ = ('_question', '_answers', '_category', '_source', '_key', '_reversed', '_matcher')
+
+    def __init__(
+            self,
+            question: Sequence[str],
+            answers: Sequence[str],
+            category: Optional[str] = None,
+            source: Optional[Path] = None,
+            **kwargs: Any,
+    ) -> None:
         assert len(answers) > 0
-        self._question = question
-        self._answers = answers
-        self._category = category
+        self._question = tuple(question)
+        self._answers = tuple(answers)
+        self._category = sys.intern(category) if category is not None else None
+        self._source = source
+        self._key: Optional[str] = None
+        self._reversed: Optional[Question] = None
+        self._matcher: Optional[Matcher] = None
 
     @property
     def question(self) -> str:
@@ -25,6 +51,16 @@ class Question:
     def answers(self) -> str:
         return ', '.join(self._answers)
 
+    @property
+    def source(self) -> Optional[Path]:
+        return self._source
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            self._key = f'{self._source or self._category}\t{self.dumps()}'
+        return self._key
+
     def get_question(self, category: bool = False) -> str:
         if category:
             return f'{self.question} ({self._category})'
@@ -32,7 +68,16 @@ class Question:
             return self.question
 
     def is_correct(self, answer: str) -> bool:
-        return answer in [self.get_parenless(answer) for answer in self._answers]
+        return self.matcher.matches(answer)
+
+    def grade(self, answer: str) -> Grade:
+        return self.matcher.grade(answer)
+
+    @property
+    def matcher(self) -> Matcher:
+        if self._matcher is None:
+            self._matcher = Matcher(self._answers)
+        return self._matcher
 
     def __str__(self) -> str:
         return f'{self.question} - {self.answers}'
@@ -44,8 +89,96 @@ class Question:
         )
 
     def reversed(self) -> 'Question':
-        return Question(question=self._answers, answers=self._question, category=self._category)
+        if self._reversed is None:
+            self._reversed = Question(
+                question=self._answers,
+                answers=self._question,
+                category=self._category,
+                source=self._source,
+            )
+            self._reversed._key = self.key
+            self._reversed._reversed = self
+        return self._reversed
 
     @staticmethod
     def get_parenless(expression: str) -> str:
-        return re.sub(' ?\(\w+\)', '', expression)
+        return get_parenless(expression)
+
+
+class DeckStore(Sequence[Question]):
+    _SEPARATOR = '\x1f'
+
+    def __init__(self) -> None:
+        # rows are kept in immutable chunks, one per extend_rows() or batch appended between reads
+        self._chunks: List[str] = []
+        self._chunk_starts = array('Q')
+        self._flushed = 0
+        self._pending: List[str] = []
+        self._end = 0
+        self._offsets = array('Q', [0])
+        self._deck_ids = array('I')
+        self._decks: List[Tuple[str, Optional[Path]]] = []
+        self._deck_index: Dict[Tuple[str, Optional[Path]], int] = {}
+
+    def append(self, question: Sequence[str], answers: Sequence[str], category: str, source: Optional[Path] = None) -> None:
+        assert len(answers) > 0
+        for part in (self._SEPARATOR.join(question), self._SEPARATOR.join(answers)):
+            self._pending.append(part)
+            self._end += len(part)
+            self._offsets.append(self._end)
+        deck = (category, source)
+        if deck not in self._deck_index:
+            self._deck_index[deck] = len(self._decks)
+            self._decks.append((sys.intern(category), source))
+        self._deck_ids.append(self._deck_index[deck])
+
+    def extend_rows(
+            self,
+            rows: Iterable[Tuple[Sequence[str], Sequence[str]]],
+            category: str,
+            source: Optional[Path] = None,
+    ) -> None:
+        for question, answers in rows:
+            self.append(question, answers, category, source)
+        self._flush()
+
+    def __len__(self) -> int:
+        return len(self._deck_ids)
+
+    @overload
+    def __getitem__(self, index: int) -> Question: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Question]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Question, List[Question]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('DeckStore index out of range')
+
+        start, middle, end = self._offsets[2 * index:2 * index + 3]
+        chunk, chunk_start = self._chunk(start)
+        start, middle, end = start - chunk_start, middle - chunk_start, end - chunk_start
+        category, source = self._decks[self._deck_ids[index]]
+        return Question(
+            question=chunk[start:middle].split(self._SEPARATOR),
+            answers=chunk[middle:end].split(self._SEPARATOR),
+            category=category,
+            source=source,
+        )
+
+    def _chunk(self, offset: int) -> Tuple[str, int]:
+        self._flush()
+        i = bisect_right(self._chunk_starts, offset) - 1
+        return self._chunks[i], self._chunk_starts[i]
+
+    def _flush(self) -> None:
+        if self._pending:
+            chunk = ''.join(self._pending)
+            self._chunks.append(chunk)
+            self._chunk_starts.append(self._flushed)
+            self._flushed += len(chunk)
+            self._pending = []
@@ -1,42 +1,147 @@
+import heapq
 import random
+from datetime import datetime
+from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
 
 from enums import Direction
+from enums import Grade
 from enums import Order
+from fenwick import FenwickTree
 from question import Question
+from schedule import Schedule
 from score import Score
 
 
+class LazyPermutation:
+    def __init__(self, size: int, rng: random.Random) -> None:
+        self._size = size
+        self._rng = rng
+        self._swapped: Dict[int, int] = {}
+        self._drawn: List[int] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def grow(self, size: int) -> None:
+        if size < self._size:
+            raise ValueError('LazyPermutation cannot shrink')
+        self._size = size
+
+    def __getitem__(self, index: int) -> int:
+        if not 0 <= index < self._size:
+            raise IndexError('LazyPermutation index out of range')
+        while len(self._drawn) <= index:
+            self._draw()
+        return self._drawn[index]
+
+    def _draw(self) -> None:
+        # one step of Fisher-Yates over a virtual range(size)
+        position = len(self._drawn)
+        chosen = self._rng.randrange(position, self._size)
+        value = self._swapped.pop(chosen, chosen)
+        if chosen != position:
+            self._swapped[chosen] = self._swapped.pop(position, position)
+        self._drawn.append(value)
+
+
 class Quiz:
-    def __init__(self, questions: List[Question], order: Order, direction: Direction = Direction.LEFT_TO_RIGHT) -> None:
-        if order == Order.RANDOM:
-            random.shuffle(questions)
+    def __init__(
+            self,
+            questions: Sequence[Question],
+            order: Order,
+            direction: Direction = Direction.LEFT_TO_RIGHT,
+            schedule: Optional[Schedule] = None,
+            question_range: Optional[slice] = None,
+            seed: Optional[int] = None,
+    ) -> None:
+        self._range = question_range or slice(None)
+        start, stop, _ = self._range.indices(len(questions))
+        stop = max(start, stop)
         self._questions = questions
+        self._order = order
         self._current_index = 0
         self._direction = direction
-        self._is_last_question_reversed = random.choice([True, False])
+        self._random = random.Random(seed)
+        self._is_last_question_reversed = self._random.choice([True, False])
         self.score = Score()
 
+        self._schedule = schedule
+        self._start = start
+        self._stop = stop
+        self._permutation: Optional[LazyPermutation] = None
+        self._due: List[Tuple[datetime, int]] = []
+        self._weights: Optional[FenwickTree] = None
+        self._sequence: List[int] = []
+        self._current: Optional[Tuple[int, Question]] = None
+        self._question_count = stop - start
+        if order == Order.RANDOM:
+            self._permutation = LazyPermutation(stop - start, self._random)
+        elif order == Order.SPACED:
+            self._due = self._due_items(start, stop)
+            heapq.heapify(self._due)
+            self._question_count = len(self._due)
+        elif order == Order.WEIGHTED:
+            assert schedule is not None
+            self._weights = FenwickTree(schedule.error_rate(questions[i].key) for i in range(start, stop))
+
+    def sync(self) -> None:
+        # take in questions appended to the sequence since the quiz was made
+        start, stop, _ = self._range.indices(len(self._questions))
+        if start != self._start:
+            return
+        stop = max(start, stop)
+        if stop <= self._stop:
+            return
+
+        if self._order == Order.SPACED:
+            due = self._due_items(self._stop, stop)
+            for item in due:
+                heapq.heappush(self._due, item)
+            self._question_count += len(due)
+        else:
+            if self._weights is not None:
+                assert self._schedule is not None
+                for i in range(self._stop, stop):
+                    self._weights.append(self._schedule.error_rate(self._questions[i].key))
+            if self._permutation is not None:
+                self._permutation.grow(stop - start)
+            self._question_count = stop - start
+        self._stop = stop
+
     def current_question(self) -> Question:
-        try:
-            question_obj = self._questions[self._current_index]
-            if self.is_question_reversed:
-                return question_obj.reversed()
-            return question_obj
-        except IndexError:
-            raise StopIteration from None
+        question_obj = self._current_question()
+        if self.is_question_reversed:
+            return question_obj.reversed()
+        return question_obj
+
+    def record_answer(self, grade: Grade) -> None:
+        if self._schedule is None:
+            return
+        index = self._question_index(self._current_index)
+        key = self._current_question().key
+        self._schedule.review(key, grade)
+        if self._weights is not None:
+            self._weights.update(index - self._start, self._schedule.error_rate(key))
 
     def current_index(self) -> int:
         return self._current_index
 
     def set_next_question(self):
-        self._is_last_question_reversed = random.choice([True, False])
+        self._is_last_question_reversed = self._random.choice([True, False])
         self._current_index += 1
 
     @property
-    def questions(self) -> List[Question]:
+    def questions(self) -> Sequence[Question]:
         return self._questions
 
+    @property
+    def question_count(self) -> int:
+        return self._question_count
+
     @property
     def is_question_reversed(self) -> bool:
         if self._direction == Direction.LEFT_TO_RIGHT:
@@ -46,4 +151,42 @@ class Quiz:
         return self._is_last_question_reversed
 
     def is_finished(self):
-        return self._current_index >= len(self._questions)
+        return self._current_index >= self._question_count
+
+    def _current_question(self) -> Question:
+        # compact decks build a new object on every access, keep one per question
+        if self._current is None or self._current[0] != self._current_index:
+            try:
+                question_obj = self._questions[self._question_index(self._current_index)]
+            except IndexError:
+                raise StopIteration from None
+            self._current = (self._current_index, question_obj)
+        return self._current[1]
+
+    def _due_items(self, start: int, stop: int) -> List[Tuple[datetime, int]]:
+        assert self._schedule is not None
+        now = datetime.now()
+        return [
+            (due, i) for i, due in enumerate(
+                (self._schedule.due(self._questions[i].key) for i in range(start, stop)),
+                start=start,
+            )
+            if due <= now
+        ]
+
+    def _question_index(self, index: int) -> int:
+        if index >= self._question_count:
+            raise IndexError('Quiz index out of range')
+        if self._permutation is not None:
+            return self._start + self._permutation[index]
+        if self._order == Order.SPACED:
+            while len(self._sequence) <= index:
+                _, question_index = heapq.heappop(self._due)
+                self._sequence.append(question_index)
+            return self._sequence[index]
+        if self._weights is not None:
+            while len(self._sequence) <= index:
+                drawn = self._weights.find(self._random.random() * self._weights.total)
+                self._sequence.append(self._start + drawn)
+            return self._sequence[index]
+        return self._start + index
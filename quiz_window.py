@@ -1,16 +1,21 @@
 from datetime import datetime
+from pathlib import Path
 from typing import Any
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Sequence
 
+from PyQt5.QtCore import QEvent
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QFileDialog
 from PyQt5.QtWidgets import QGridLayout
 from PyQt5.QtWidgets import QLabel
+from PyQt5.QtWidgets import QPlainTextEdit
 from PyQt5.QtWidgets import QProgressBar
 from PyQt5.QtWidgets import QPushButton
 from PyQt5.QtWidgets import QSizePolicy
 from PyQt5.QtWidgets import QSpacerItem
-from PyQt5.QtWidgets import QTextEdit
 from PyQt5.QtWidgets import QWidget
 
 import settings
@@ -21,13 +26,18 @@ from custom_widgets import QInfoDialog
 from custom_widgets import ScoreQLabel
 from database import Database
 from enums import Direction
+from enums import Grade
 from enums import Order
+from events import EVENTS
 from question import Question
 from quiz import Quiz
+from schedule import get_schedule
+from schedule import save_schedule
 from settings import ROOT_PATH
 from stats import Entry
-from stats import STATS
+from stats import get_stats
 from utils import move_to_screen
+from utils import Timedelta
 
 
 class QuizWidget(QWidget):
@@ -42,21 +52,25 @@ class QuizWidget(QWidget):
         self._timer.setMinimumWidth(100)
         self._timer.start()
         self._mistakes: List[Question] = []
+        self._results: Dict[Path, Entry] = {}
+        self._answered_at = Timedelta()
         self._direction = direction
 
         self._l_question = QLabel()
-        self._te_logs = QTextEdit()
+        self._te_logs = QPlainTextEdit()
+        self._te_logs.setMaximumBlockCount(settings.LOG_MAX_LINES)
+        self._pending_logs: List[str] = []
+        # flush once control returns to the event loop, so every answer is a single update
+        self._logs_timer = QTimer(self)
+        self._logs_timer.setSingleShot(True)
+        self._logs_timer.setInterval(0)
+        self._logs_timer.timeout.connect(self.flush_logs)
         self._te_answer = CustomQTextEdit(self.check_answer)
         self._range = kwargs.get('range')
+        self._loading = kwargs.get('loading', False)
         self.initUI()
         self.show()
-        self.redo_test(self.__get_questions())
-
-    def __get_questions(self) -> List[Question]:
-        questions = self._database.questions
-        if self._range is not None:
-            questions = questions[self._range]
-        return questions
+        self.redo_test()
 
     def initUI(self) -> None:
         self.setGeometry(*settings.WINDOW_GEOMETRY)
@@ -131,20 +145,69 @@ class QuizWidget(QWidget):
 
         answer = self._te_answer.toPlainText()
 
-        self._te_logs.append(color_str(question_object.get_question() + ": " + answer))
-        if question_object.is_correct(answer):
+        self.log(color_str(question_object.get_question() + ": " + answer))
+        grade = question_object.grade(answer)
+        self._quiz.record_answer(grade)
+        self.record_event(question_object, grade)
+        if grade == Grade.CORRECT:
             string = color_str(settings.GOOD_ANS_TEXT, settings.GOOD_ANS_COLOR)
             self._l_score.add_correct()
-            self._te_logs.append(string)
+            self.log(string)
+        elif grade == Grade.ALMOST_CORRECT:
+            self.log(color_str(settings.ALMOST_ANS_TEXT, settings.ALMOST_ANS_COLOR) + question_object.answers)
+            self._l_score.add_almost_correct()
         else:
-            self._te_logs.append(color_str(settings.BAD_ANS_TEXT, settings.BAD_ANS_COLOR) + question_object.answers)
+            self.log(color_str(settings.BAD_ANS_TEXT, settings.BAD_ANS_COLOR) + question_object.answers)
             self._l_score.add_incorrect()
             self._mistakes.append(question_object.reversed() if self._quiz.is_question_reversed else question_object)
 
         self.update_question()
-        if self._quiz.is_finished():
+        if self._quiz.is_finished() and not self._is_waiting_for_questions():
             self.perform_end_quiz_actions()
 
+    def questions_added(self) -> None:
+        waiting = self._quiz.is_finished()
+        self._quiz.sync()
+        self.update_progress_bar()
+        if waiting and not self._quiz.is_finished():
+            self._l_question.setText(self._quiz.current_question().get_question(category=True))
+
+    def loading_finished(self) -> None:
+        waiting = self._is_waiting_for_questions()
+        self._loading = False
+        if waiting and self._quiz.is_finished():
+            self._l_question.setText('')
+            self.perform_end_quiz_actions()
+
+    def _is_waiting_for_questions(self) -> bool:
+        return self._loading and self._quiz.questions is self._database.questions
+
+    def log(self, html: str) -> None:
+        self._pending_logs.append(html)
+        if not self._logs_timer.isActive():
+            self._logs_timer.start()
+
+    def flush_logs(self) -> None:
+        for html in self._pending_logs:
+            self._te_logs.appendHtml(html)
+        self._pending_logs = []
+
+    def record_event(self, question: Question, grade: Grade) -> None:
+        elapsed = self._timer.elapsed
+        response_time = elapsed - self._answered_at
+        self._answered_at = elapsed
+        direction = Direction.RIGHT_TO_LEFT if self._quiz.is_question_reversed else Direction.LEFT_TO_RIGHT
+        EVENTS.record(question, direction, grade, response_time)
+
+        if question.source is None:
+            return
+        entry = self._results.setdefault(question.source, Entry(quiz_path=question.source))
+        if grade == Grade.INCORRECT:
+            entry.incorrect += 1
+        else:
+            entry.correct += 1
+        entry.time_total += response_time
+
     def save_errors(self) -> None:
         if len(self._mistakes) == 0:
             QInfoDialog(text='There are no errors (yet)', parent=self).exec_()
@@ -162,27 +225,45 @@ class QuizWidget(QWidget):
             for question_obj in self._mistakes:
                 f.write('{}\n'.format(question_obj.dumps()))
 
-    def redo_test(self, questions: Optional[List[Question]]) -> None:
+    def redo_test(self, questions: Optional[Sequence[Question]] = None, order: Optional[Order] = None) -> None:
+        order = order or self._order
+        question_range = None
+        if not questions:
+            questions = self._database.questions
+            question_range = self._range
         try:
-            questions = questions or self.__get_questions()
             self._mistakes = []
+            self._results = {}
+            self._answered_at = Timedelta()
             self._te_answer.setFocus()
             self._l_score.clear()
             self._l_score.update()
-            self._quiz = Quiz(questions, self._order, self._direction)
+            self._quiz = Quiz(
+                questions,
+                order,
+                self._direction,
+                schedule=get_schedule(),
+                question_range=question_range,
+                seed=settings.QUIZ_SEED,
+            )
             self._l_question.setText(self._quiz.current_question().get_question(category=True))
             self.update_progress_bar()
-            self._te_logs.setText('')
+            self._pending_logs = []
+            self._te_logs.clear()
             self._timer.start()
         except StopIteration:
-            QInfoDialog(text='There are no questions. Did you set question range properly?', parent=self).exec_()
+            if order == Order.SPACED:
+                QInfoDialog(text='There are no questions due for review', parent=self).exec_()
+            else:
+                QInfoDialog(text='There are no questions. Did you set question range properly?', parent=self).exec_()
             self.close()
 
     def redo_errors(self) -> None:
         if len(self._mistakes) == 0:
             QInfoDialog(text='There are no errors (yet)', parent=self).exec_()
             return
-        self.redo_test(questions=self._mistakes)
+        order = self._order if self._order in (Order.SEQUENTIAL, Order.RANDOM) else Order.RANDOM
+        self.redo_test(questions=self._mistakes, order=order)
         self._mistakes = []
 
     def update_question(self):
@@ -192,12 +273,12 @@ class QuizWidget(QWidget):
         try:
             self._l_question.setText(self._quiz.current_question().get_question(category=True))
         except StopIteration:
-            self._l_question.setText('')
+            self._l_question.setText('Loading more questions...' if self._is_waiting_for_questions() else '')
 
     def update_progress_bar(self) -> None:
-        self._progress.setMaximum(len(self._quiz.questions))
+        self._progress.setMaximum(self._quiz.question_count)
         question_index = self._quiz.current_index()
-        question_count = len(self._quiz.questions)
+        question_count = self._quiz.question_count
         self._progress.setValue(question_index)
         self._progress.setFormat(
             "{:.2f}% ({}/{})".format(
@@ -207,20 +288,16 @@ class QuizWidget(QWidget):
             ),
         )
 
+    def closeEvent(self, event: QEvent) -> None:
+        save_schedule()
+        event.accept()
+
     def perform_end_quiz_actions(self):
         self._timer.stop()
-        if len(self._database.paths) > 1:
-            return
-
-        correct = self._l_score.score.correct
-        incorrect = self._l_score.score.incorrect
-
-        STATS.add(
-            Entry(
-                correct=correct,
-                incorrect=incorrect,
-                quiz_path=self._database.paths[0],
-                time_total=self._timer.elapsed.to_timedelta(),
-                timestamp=datetime.now(),
-            ),
-        )
+        save_schedule()
+        timestamp = datetime.now()
+        stats = get_stats()
+        for entry in self._results.values():
+            entry.timestamp = timestamp
+            stats.add(entry)
+        self._results = {}
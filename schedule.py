@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict
+from typing import Optional
+
+from enums import Grade
+from serializable import JSONSerializable
+from settings import SCHEDULE_PATH
+
+
+_QUALITIES = {
+    Grade.CORRECT: 5,
+    Grade.ALMOST_CORRECT: 3,
+    Grade.INCORRECT: 1,
+}
+
+
+@dataclass
+class Card(JSONSerializable):
+    easiness: float = 2.5
+    interval: int = 0
+    repetitions: int = 0
+    due: datetime = field(default_factory=datetime.now)
+    correct: int = 0
+    incorrect: int = 0
+
+    @property
+    def error_rate(self) -> float:
+        return (self.incorrect + 1) / (self.correct + self.incorrect + 2)
+
+    def review(self, grade: Grade, now: Optional[datetime] = None) -> None:
+        if grade == Grade.INCORRECT:
+            self.incorrect += 1
+        else:
+            self.correct += 1
+
+        # SM-2
+        quality = _QUALITIES[grade]
+        if quality < 3:
+            self.repetitions = 0
+            self.interval = 1
+        else:
+            if self.repetitions == 0:
+                self.interval = 1
+            elif self.repetitions == 1:
+                self.interval = 6
+            else:
+                self.interval = round(self.interval * self.easiness)
+            self.repetitions += 1
+        self.easiness = max(1.3, self.easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due = (now or datetime.now()) + timedelta(days=self.interval)
+
+
+@dataclass
+class Schedule(JSONSerializable):
+    cards: Dict[str, Card] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._dirty = False
+
+    def save(self, path: Path) -> None:
+        if not self._dirty:
+            return
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps(self.to_json(), sort_keys=True))
+        os.replace(tmp_path, path)
+        self._dirty = False
+
+    def due(self, key: str) -> datetime:
+        card = self.cards.get(key)
+        return card.due if card is not None else datetime.min
+
+    def error_rate(self, key: str) -> float:
+        card = self.cards.get(key)
+        return card.error_rate if card is not None else Card().error_rate
+
+    def review(self, key: str, grade: Grade) -> None:
+        self.cards.setdefault(key, Card()).review(grade)
+        self._dirty = True
+
+
+_schedule: Optional[Schedule] = None
+
+
+def get_schedule() -> Schedule:
+    global _schedule
+    if _schedule is None:
+        _schedule = Schedule.load(SCHEDULE_PATH)
+    return _schedule
+
+
+def save_schedule() -> None:
+    # nothing to write when no quiz has loaded the schedule
+    if _schedule is not None:
+        _schedule.save(SCHEDULE_PATH)
@@ -2,12 +2,17 @@ class Score:
     def __init__(self):
         self.correct = 0
         self.incorrect = 0
+        self.almost = 0
         self.total = 0
 
     def good_ans(self):
         self.correct += 1
         self.total += 1
 
+    def almost_ans(self):
+        self.almost += 1
+        self.good_ans()
+
     def bad_ans(self):
         self.incorrect += 1
         self.total += 1
@@ -18,6 +23,7 @@ class Score:
     def clear(self):
         self.correct = 0
         self.incorrect = 0
+        self.almost = 0
         self.total = 0
 
     def __str__(self):
@@ -1,14 +1,21 @@
 import json
 from abc import ABC
-from abc import abstractmethod
 from datetime import datetime
 from datetime import timedelta
 from enum import Enum
 from pathlib import Path
+from pathlib import PurePath
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import get_args
+from typing import get_origin
+from typing import get_type_hints
+from typing import List
+from typing import Optional
 from typing import overload
 from typing import Protocol
+from typing import Tuple
 from typing import Type
 from typing import TypeVar
 from typing import Union
@@ -40,29 +47,182 @@ def _jsonify(value):
         return str(value)
     if isinstance(value, list):
         return [_jsonify(val) for val in value]
+    if isinstance(value, dict):
+        return {str(key): _jsonify(val) for key, val in value.items()}
     if isinstance(value, datetime):
         return value.isoformat()
     if isinstance(value, JSONSerializable):
         return value.to_json()
     if isinstance(value, (timedelta, Timedelta)):
-        return '{}:{}:{}'.format(value.days, value.seconds, value.microseconds)
+        return format_timedelta(value)
     if isinstance(value, Enum):
         return value.value
     return value
 
 
+def format_timedelta(value: timedelta) -> str:
+    return '{}:{}:{}'.format(value.days, value.seconds, value.microseconds)
+
+
+def parse_timedelta(value: str) -> timedelta:
+    days, seconds, microseconds = value.split(':')
+    return timedelta(int(days), int(seconds), int(microseconds))
+
+
+# Converters are built once per annotation, None means the value is kept as is.
+_Converter = Optional[Callable[[Any], Any]]
+_ENCODERS: Dict[type, Callable[[Any], Dict[str, Any]]] = {}
+_DECODERS: Dict[type, Callable[[Dict[str, Any]], Any]] = {}
+_MISSING = object()
+
+
+def _optional_args(hint: Any) -> Optional[Tuple[Any, ...]]:
+    if get_origin(hint) is not Union:
+        return None
+    return tuple(arg for arg in get_args(hint) if arg is not type(None))
+
+
+def _value_encoder(hint: Any) -> _Converter:
+    args = get_args(hint)
+    inner_args = _optional_args(hint)
+    if inner_args is not None:
+        if len(inner_args) != 1:
+            return _jsonify
+        inner = _value_encoder(inner_args[0])
+        if inner is None:
+            return None
+        convert_inner: Callable[[Any], Any] = inner
+        return lambda value: None if value is None else convert_inner(value)
+    if get_origin(hint) is list:
+        item = _value_encoder(args[0]) if args else _jsonify
+        if item is None:
+            return list
+        convert_item: Callable[[Any], Any] = item
+        return lambda value: [convert_item(val) for val in value]
+    if get_origin(hint) is dict:
+        value_item = _value_encoder(args[1]) if args else _jsonify
+        if value_item is None:
+            return lambda value: {str(key): val for key, val in value.items()}
+        convert_value: Callable[[Any], Any] = value_item
+        return lambda value: {str(key): convert_value(val) for key, val in value.items()}
+    if isinstance(hint, type):
+        if issubclass(hint, Enum):
+            return lambda value: value.value
+        if issubclass(hint, (str, int, float, bool)):
+            return None
+        if issubclass(hint, PurePath):
+            return str
+        if issubclass(hint, datetime):
+            return datetime.isoformat
+        if issubclass(hint, timedelta):
+            return format_timedelta
+        if issubclass(hint, JSONSerializable):
+            return lambda value: value.to_json()
+    return _jsonify
+
+
+def _value_decoder(hint: Any) -> _Converter:
+    args = get_args(hint)
+    inner_args = _optional_args(hint)
+    if inner_args is not None:
+        if len(inner_args) != 1:
+            return None
+        inner = _value_decoder(inner_args[0])
+        if inner is None:
+            return None
+        convert_inner: Callable[[Any], Any] = inner
+        return lambda value: None if value is None else convert_inner(value)
+    if get_origin(hint) is list:
+        item = _value_decoder(args[0]) if args else None
+        if item is None:
+            return list
+        convert_item: Callable[[Any], Any] = item
+        return lambda value: [convert_item(val) for val in value]
+    if get_origin(hint) is dict:
+        key = _value_decoder(args[0]) if args else None
+        item = _value_decoder(args[1]) if args else None
+        if key is None and item is None:
+            return dict
+        key = key or (lambda value: value)
+        item = item or (lambda value: value)
+        return lambda value: {key(k): item(val) for k, val in value.items()}
+    if isinstance(hint, type):
+        if issubclass(hint, Enum):
+            return hint
+        if issubclass(hint, (str, int, float, bool)):
+            return None
+        if issubclass(hint, PurePath):
+            return hint
+        if issubclass(hint, datetime):
+            return datetime.fromisoformat
+        if issubclass(hint, timedelta):
+            return parse_timedelta
+        if issubclass(hint, JSONSerializable):
+            return hint.from_json
+    return None
+
+
+def _compile(name: str, lines: List[str], converters: Dict[str, Callable[[Any], Any]]) -> Callable[..., Any]:
+    namespace: Dict[str, Any] = {}
+    exec('\n'.join(lines), {'_MISSING': _MISSING, **converters}, namespace)
+    return namespace[name]
+
+
+def _fields(cls: type) -> List[Tuple[str, Any]]:
+    hints = get_type_hints(cls)
+    return [(name, hints[name]) for name in cls.__annotations__]
+
+
+def _encoder(cls: type) -> Callable[[Any], Dict[str, Any]]:
+    encoder = _ENCODERS.get(cls)
+    if encoder is None:
+        converters = {}
+        items = []
+        for i, (name, hint) in enumerate(_fields(cls)):
+            converter = _value_encoder(hint)
+            if converter is None:
+                items.append(f'{name!r}: obj.{name}')
+            else:
+                converters[f'_c{i}'] = converter
+                items.append(f'{name!r}: _c{i}(obj.{name})')
+        lines = [
+            'def encode(obj):',
+            f'    return {{{", ".join(items)}}}',
+        ]
+        encoder = _ENCODERS[cls] = _compile('encode', lines, converters)
+    return encoder
+
+
+def _decoder(cls: type) -> Callable[[Dict[str, Any]], Any]:
+    decoder = _DECODERS.get(cls)
+    if decoder is None:
+        converters: Dict[str, Callable[[Any], Any]] = {'_cls': cls}
+        lines = [
+            'def decode(json):',
+            '    kwargs = {}',
+        ]
+        for i, (name, hint) in enumerate(_fields(cls)):
+            converter = _value_decoder(hint)
+            lines.append(f'    value = json.get({name!r}, _MISSING)')
+            lines.append('    if value is not _MISSING:')
+            if converter is None:
+                lines.append(f'        kwargs[{name!r}] = value')
+            else:
+                converters[f'_c{i}'] = converter
+                lines.append(f'        kwargs[{name!r}] = _c{i}(value)')
+        lines.append('    return _cls(**kwargs)')
+        decoder = _DECODERS[cls] = _compile('decode', lines, converters)
+    return decoder
+
+
 class JSONSerializable(ABC, _JSONSerializable):
 
     def to_json(self) -> Dict[str, Any]:
-        return {
-            key: _jsonify(getattr(self, key))
-            for key in self.__annotations__
-        }
+        return _encoder(type(self))(self)
 
     @classmethod
-    @abstractmethod
     def from_json(cls: Type[T], json: Dict[str, Any]) -> T:
-        pass
+        return _decoder(cls)(json)
 
     @classmethod
     def load(cls: Type[T], file_path: Path) -> T:
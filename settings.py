@@ -1,20 +1,35 @@
-import darkdetect
 from pathlib import Path
 
 
 
 UTF8_ENCODING = 'utf-8'
 WINDOWS_ENCODING = 'windows-1250'
+# Number of leading bytes used to guess file encoding, None checks whole file
+ENCODING_DETECTION_PREFIX = None
 
 BAD_ANS_TEXT = 'Jesteś dupa! Prawidłowa odpowiedź to: '
 BAD_ANS_COLOR = 'red'
 GOOD_ANS_TEXT = 'Brawo!'
 GOOD_ANS_COLOR = 'green'
+ALMOST_ANS_TEXT = 'Prawie! Prawidłowa odpowiedź to: '
+ALMOST_ANS_COLOR = 'orange'
 
-if darkdetect.isDark():
-    DEFAULT_COLOR = 'white'
-else:
-    DEFAULT_COLOR = 'black'
+ANSWER_CASE_SENSITIVE = True
+ANSWER_NORMALIZE_WHITESPACE = False
+# 'NFC', 'NFKD' etc., None leaves answers as typed
+ANSWER_UNICODE_FORM = None
+ANSWER_FOLD_DIACRITICS = False
+# Accept typos as almost correct, allowed edit distance by answer length:
+# (max answer length or None for any longer, distance)
+FUZZY_MATCHING = False
+FUZZY_MAX_DISTANCE = [
+    (3, 0),
+    (7, 1),
+    (None, 2),
+]
+
+# None follows the system theme
+DEFAULT_COLOR = None
 
 WINDOW_GEOMETRY = [
     10,
@@ -26,8 +41,31 @@ WINDOW_GEOMETRY = [
 ROOT_PATH = Path(__file__).parent
 CONFIG_PATH = ROOT_PATH.joinpath('.config.json')
 STATS_PATH = ROOT_PATH.joinpath('.stats.json')
+STATS_LOG_PATH = ROOT_PATH.joinpath('.stats.jsonl')
+STATS_SNAPSHOT_PATH = ROOT_PATH.joinpath('.stats.bin')
+DECK_CACHE_PATH = ROOT_PATH.joinpath('.decks.cache')
+SCHEDULE_PATH = ROOT_PATH.joinpath('.schedule.json')
+EVENTS_PATH = ROOT_PATH.joinpath('.events.bin')
+EVENTS_SOURCES_PATH = ROOT_PATH.joinpath('.events.sources')
+
+# Directory with one cached deck per file, the least recently used go first
+DECK_CACHE_MAX_ENTRIES = 10000
+
+# Files are parsed on a pool when more than one worker is set,
+# 'thread' helps with slow disks, 'process' scales parsing with cores
+LOADER_WORKERS = 1
+LOADER_EXECUTOR = 'thread'
+# Milliseconds before the loading progress dialog shows up
+LOADER_PROGRESS_DELAY = 500
+# Keep loaded questions in a single text buffer instead of one object per line
+COMPACT_DECKS = False
+# Fixed seed reproduces question order, None picks a new one every quiz
+QUIZ_SEED = None
 
 EXCLUDED_EXTENSIONS = ['.swp']
+WATCH_FILE_TREE = True
+# Rescan expanded directories every n ms, for file systems without change notifications
+FILE_TREE_POLL_INTERVAL = None
 IGNORED_LINES = [
     '\n',
 ]
@@ -37,6 +75,20 @@ COMMENT_CHARS = [
 
 WINDOW_RESIZABLE = False
 
+# Lines kept in the quiz answer log, older ones are dropped
+LOG_MAX_LINES = 1000
+
+# Quiz timer refreshes per second, None follows the screen refresh rate
+TIMER_REFRESH_RATE = 30
+
+# Fold the stats log into a binary snapshot once this many entries are
+# read from it at startup, None keeps the plain JSON lines log
+STATS_SNAPSHOT_AFTER = None
+
+# Longer stats series are drawn without point symbols
+STATS_SYMBOLS_LIMIT = 500
+STATS_MOVING_AVERAGE_WINDOW = 20
+
 try:
     import local_settings  # noqa: F401
 except ImportError:
@@ -1,17 +1,49 @@
 from __future__ import annotations
 
+import heapq
+import json
+import logging
+import os
+import struct
+import threading
+from bisect import bisect_left
+from bisect import bisect_right
 from dataclasses import dataclass
 from dataclasses import field
 from datetime import datetime
 from datetime import timedelta
 from pathlib import Path
-from typing import Any
 from typing import Dict
+from typing import Iterable
 from typing import List
+from typing import Optional
 from typing import Type
 
+from enums import Resolution
 from serializable import JSONSerializable
+from settings import STATS_LOG_PATH
 from settings import STATS_PATH
+from settings import STATS_SNAPSHOT_AFTER
+from settings import STATS_SNAPSHOT_PATH
+
+
+ROLLUP_RESOLUTIONS = (Resolution.DAY, Resolution.WEEK)
+
+_SNAPSHOT_MAGIC = b'STS1'
+# magic, inode and size of the log already included, number of paths
+_SNAPSHOT_HEADER = struct.Struct('<4sQQI')
+_SNAPSHOT_PATH_LENGTH = struct.Struct('<I')
+# correct, incorrect, path index, time total and timestamp in microseconds
+_SNAPSHOT_RECORD = struct.Struct('<IIIqq')
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def bucket_start(timestamp: datetime, resolution: Resolution) -> datetime:
+    start = datetime(timestamp.year, timestamp.month, timestamp.day)
+    if resolution == Resolution.WEEK:
+        start -= timedelta(days=start.weekday())
+    return start
 
 
 @dataclass
@@ -26,26 +58,10 @@ class Entry(JSONSerializable):
     def total(self) -> int:
         return self.correct + self.incorrect
 
-    @classmethod
-    def from_json(cls: Type[Entry], json: Dict[str, Any]) -> Entry:
-        correct = json.get('correct', 0)
-        incorrect = json.get('incorrect', 0)
-        days, seconds, microseconds = [int(val) for val in json.get('time_total', '0:00:01.520000').split(':')]
-        quiz_path = Path(json.get('quiz_path', Path()))
-        timestamp = datetime.fromisoformat(json.get('timestamp', datetime.now().isoformat()))
-
-        return Entry(
-            correct,
-            incorrect,
-            quiz_path,
-            time_total=timedelta(days=days, seconds=seconds, microseconds=microseconds),
-            timestamp=timestamp,
-        )
-
     def __add__(self, o: Entry) -> Entry:
         return Entry(
             correct=self.correct + o.correct,
-            incorrect=self.correct + o.incorrect,
+            incorrect=self.incorrect + o.incorrect,
             quiz_path=o.quiz_path,
             time_total=self.time_total + o.time_total,
             timestamp=o.timestamp,
@@ -56,22 +72,231 @@ class Entry(JSONSerializable):
 class Stats(JSONSerializable):
     entries: List[Entry] = field(default_factory=list)
 
+    def __post_init__(self) -> None:
+        self._log_path: Optional[Path] = None
+        self._snapshot_path: Optional[Path] = None
+        self._by_path: Dict[Path, List[Entry]] = {}
+        self._timestamps: Dict[Path, List[datetime]] = {}
+        self._rollups: Dict[Resolution, Dict[Path, Dict[datetime, Entry]]] = {}
+        for entry in self.entries:
+            self._index(entry)
+        self.rebuild_rollups()
+
     @classmethod
-    def from_json(cls: Type[Stats], json: Dict[str, Any]) -> Stats:
-        entries = json.get('entries', [])
+    def load_log(
+            cls: Type[Stats],
+            log_path: Path,
+            legacy_path: Optional[Path] = None,
+            snapshot_path: Optional[Path] = None,
+            snapshot_after: Optional[int] = None,
+    ) -> Stats:
+        # an existing snapshot is always read, new ones are written only when enabled
+        if snapshot_path is not None and snapshot_after is None and not snapshot_path.exists():
+            snapshot_path = None
 
-        return Stats(
-            [Entry.from_json(entry) for entry in entries],
-        )
+        if (
+                not log_path.exists() and legacy_path is not None and legacy_path.exists() and
+                (snapshot_path is None or not snapshot_path.exists())
+        ):
+            stats = cls.load(legacy_path)
+            stats._snapshot_path = snapshot_path
+            stats.compact(log_path)
+            legacy_path.rename(legacy_path.with_name(legacy_path.name + '.bak'))
+            return stats
+
+        stats = cls()
+        stats._log_path = log_path
+        stats._snapshot_path = snapshot_path
+        offset = stats._read_snapshot(snapshot_path, log_path) if snapshot_path is not None else 0
+        skipped = 0
+        replayed = 0
+        try:
+            with open(log_path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        stats._append(Entry.from_json(json.loads(line)))
+                        replayed += 1
+                    except (ValueError, TypeError, AttributeError):
+                        skipped += 1
+        except FileNotFoundError:
+            return stats
+
+        if skipped > 0:
+            logging.warning('Skipped %d malformed lines in %s', skipped, log_path)
+            stats.compact(log_path)
+        elif snapshot_after is not None and replayed >= snapshot_after:
+            stats.compact(log_path)
+        return stats
+
+    def compact(self, log_path: Path) -> None:
+        tmp_path = log_path.with_name(log_path.name + '.tmp')
+        if self._snapshot_path is not None:
+            # the snapshot remembers which log it covers, so a crash before
+            # the log is emptied doesn't replay those entries twice
+            self._write_snapshot(self._snapshot_path, log_path)
+            open(tmp_path, 'w').close()
+        else:
+            with open(tmp_path, 'w') as f:
+                for entry in self.entries:
+                    f.write(self._dumps_entry(entry))
+        os.replace(tmp_path, log_path)
+        self._log_path = log_path
 
     def add(self, entry: Entry) -> None:
+        self._append(entry)
+        if self._log_path is not None:
+            with open(self._log_path, 'a') as f:
+                f.write(self._dumps_entry(entry))
+
+    def get_entries_for_paths(
+            self,
+            paths: Iterable[Path],
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+    ) -> List[Entry]:
+        selected = []
+        for path in set(paths):
+            entries = self._by_path.get(path)
+            if entries is None:
+                continue
+            timestamps = self._timestamps[path]
+            start = bisect_left(timestamps, since) if since is not None else 0
+            stop = bisect_right(timestamps, until) if until is not None else len(timestamps)
+            selected.append(entries[start:stop])
+        return list(heapq.merge(*selected, key=lambda e: e.timestamp))
+
+    def get_rollup(
+            self,
+            paths: Iterable[Path],
+            resolution: Resolution,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+    ) -> List[Entry]:
+        totals: Dict[datetime, Entry] = {}
+        for path in set(paths):
+            for start, bucket in self._rollups[resolution].get(path, {}).items():
+                if since is not None and start < bucket_start(since, resolution):
+                    continue
+                if until is not None and start > until:
+                    continue
+                totals[start] = totals.get(start, Entry()) + bucket
+        return [totals[start] for start in sorted(totals)]
+
+    def rebuild_rollups(self) -> None:
+        self._rollups = {resolution: {} for resolution in ROLLUP_RESOLUTIONS}
+        for entry in self.entries:
+            self._roll_up(entry)
+
+    def _append(self, entry: Entry) -> None:
         self.entries.append(entry)
+        self._index(entry)
+        self._roll_up(entry)
+
+    def _roll_up(self, entry: Entry) -> None:
+        for resolution in ROLLUP_RESOLUTIONS:
+            buckets = self._rollups[resolution].setdefault(entry.quiz_path, {})
+            start = bucket_start(entry.timestamp, resolution)
+            bucket = buckets.get(start)
+            if bucket is None:
+                bucket = buckets[start] = Entry(quiz_path=entry.quiz_path, timestamp=start)
+            bucket.correct += entry.correct
+            bucket.incorrect += entry.incorrect
+            bucket.time_total += entry.time_total
+
+    def _index(self, entry: Entry) -> None:
+        entries = self._by_path.setdefault(entry.quiz_path, [])
+        timestamps = self._timestamps.setdefault(entry.quiz_path, [])
+        position = bisect_right(timestamps, entry.timestamp)
+        timestamps.insert(position, entry.timestamp)
+        entries.insert(position, entry)
+
+    def _read_snapshot(self, path: Path, log_path: Path) -> int:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
 
-    def get_entries_for_paths(self, paths: List[Path]) -> List[Entry]:
-        return [
-            e for e in STATS.entries
-            if e.quiz_path in set(paths)
+        try:
+            magic, log_inode, log_size, path_count = _SNAPSHOT_HEADER.unpack_from(data)
+            if magic != _SNAPSHOT_MAGIC:
+                raise ValueError('not a stats snapshot')
+            position = _SNAPSHOT_HEADER.size
+            paths = []
+            for _ in range(path_count):
+                (length,) = _SNAPSHOT_PATH_LENGTH.unpack_from(data, position)
+                position += _SNAPSHOT_PATH_LENGTH.size
+                paths.append(Path(data[position:position + length].decode('utf-8')))
+                position += length
+            entries = [
+                Entry(
+                    correct,
+                    incorrect,
+                    paths[path_index],
+                    timedelta(microseconds=time_total),
+                    _EPOCH + timedelta(microseconds=timestamp),
+                )
+                for correct, incorrect, path_index, time_total, timestamp
+                in _SNAPSHOT_RECORD.iter_unpack(data[position:])
+            ]
+        except (struct.error, ValueError, IndexError) as e:
+            logging.warning('Could not read stats snapshot %s: %s', path, e)
+            return 0
+
+        for entry in entries:
+            self._append(entry)
+        try:
+            stat = os.stat(log_path)
+        except FileNotFoundError:
+            return 0
+        if stat.st_ino == log_inode and stat.st_size >= log_size:
+            return log_size
+        return 0
+
+    def _write_snapshot(self, path: Path, log_path: Path) -> None:
+        try:
+            stat = os.stat(log_path)
+            log_inode, log_size = stat.st_ino, stat.st_size
+        except FileNotFoundError:
+            log_inode, log_size = 0, 0
+
+        path_indexes: Dict[Path, int] = {}
+        records = [
+            _SNAPSHOT_RECORD.pack(
+                entry.correct,
+                entry.incorrect,
+                path_indexes.setdefault(entry.quiz_path, len(path_indexes)),
+                entry.time_total // _MICROSECOND,
+                (entry.timestamp - _EPOCH) // _MICROSECOND,
+            )
+            for entry in self.entries
         ]
+        chunks = [_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, log_inode, log_size, len(path_indexes))]
+        for quiz_path in path_indexes:
+            encoded = str(quiz_path).encode('utf-8')
+            chunks.append(_SNAPSHOT_PATH_LENGTH.pack(len(encoded)))
+            chunks.append(encoded)
+
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(chunks))
+            f.write(b''.join(records))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _dumps_entry(entry: Entry) -> str:
+        return json.dumps(entry.to_json(), sort_keys=True) + '\n'
+
+
+_stats: Optional[Stats] = None
+_stats_lock = threading.Lock()
 
 
-STATS = Stats.load(STATS_PATH)
+def get_stats() -> Stats:
+    global _stats
+    # may be called from the background preload thread
+    with _stats_lock:
+        if _stats is None:
+            _stats = Stats.load_log(STATS_LOG_PATH, STATS_PATH, STATS_SNAPSHOT_PATH, STATS_SNAPSHOT_AFTER)
+        return _stats
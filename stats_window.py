@@ -1,19 +1,93 @@
 from pathlib import Path
+from typing import Any
+from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Tuple
 
+import numpy as np
 import pyqtgraph as pg
 from PyQt5.QtWidgets import QGridLayout
+from PyQt5.QtWidgets import QHBoxLayout
 from PyQt5.QtWidgets import QWidget
 
 import settings
+from custom_widgets import RadioGroupWidget
+from custom_widgets import ValueRadioButton
+from enums import Resolution
 from stats import Entry
-from stats import STATS
+from stats import get_stats
+from utils import group_widgets
 from utils import move_to_screen
 
 
+# rollups only have buckets for days and weeks with quizzes
+_WINDOW_UNITS = {
+    Resolution.ENTRY: 'quizzes',
+    Resolution.DAY: 'days with quizzes',
+    Resolution.WEEK: 'weeks with quizzes',
+}
+
+
+def aggregate_series(entries: List[Entry]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # running sum of the latest entry of every path, entries sorted by timestamp
+    correct = np.empty(len(entries), dtype=np.int64)
+    incorrect = np.empty(len(entries), dtype=np.int64)
+    latest: Dict[Path, Entry] = {}
+    correct_sum = 0
+    incorrect_sum = 0
+    for i, entry in enumerate(entries):
+        previous = latest.get(entry.quiz_path)
+        if previous is not None:
+            correct_sum -= previous.correct
+            incorrect_sum -= previous.incorrect
+        correct_sum += entry.correct
+        incorrect_sum += entry.incorrect
+        latest[entry.quiz_path] = entry
+        correct[i] = correct_sum
+        incorrect[i] = incorrect_sum
+
+    x = np.arange(1, len(entries) + 1)
+    return x, correct, incorrect, correct + incorrect
+
+
+def moving_sum(values: np.ndarray, window: int) -> np.ndarray:
+    sums = np.cumsum(values, dtype=np.float64)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums
+
+
+def percentage(part: np.ndarray, whole: np.ndarray) -> np.ndarray:
+    ret = np.full(len(part), np.nan)
+    np.divide(part * 100.0, whole, out=ret, where=whole != 0)
+    return ret
+
+
+def rolling_accuracy(entries: List[Entry], window: int) -> np.ndarray:
+    correct = np.fromiter((e.correct for e in entries), dtype=np.int64, count=len(entries))
+    total = np.fromiter((e.total for e in entries), dtype=np.int64, count=len(entries))
+    return percentage(moving_sum(correct, window), moving_sum(total, window))
+
+
+def bucket_series(buckets: List[Entry]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    x = np.fromiter((b.timestamp.timestamp() for b in buckets), dtype=np.float64, count=len(buckets))
+    correct = np.fromiter((b.correct for b in buckets), dtype=np.int64, count=len(buckets))
+    incorrect = np.fromiter((b.incorrect for b in buckets), dtype=np.int64, count=len(buckets))
+    return x, correct, incorrect, correct + incorrect
+
+
 class StatsWindow(QWidget):
-    def __init__(self, paths: List[Path], *args, **kwargs) -> None:
+    def __init__(
+            self,
+            paths: List[Path],
+            entries: Optional[List[Entry]] = None,
+            resolution: Resolution = Resolution.ENTRY,
+            *args: Any,
+            **kwargs: Any,
+    ) -> None:
         super().__init__()
+        self._paths = paths
+        self._entries = entries
         title = paths[0] if len(paths) == 1 else ''
 
         self.setWindowTitle('Stats')
@@ -24,57 +98,92 @@ class StatsWindow(QWidget):
         move_to_screen(widget=self, posx=posx, posy=posy)
 
         layout = QGridLayout()
-        axis = pg.DateAxisItem()
-        plot = pg.PlotWidget(title=title)
-        plot.setAxisItems({'bottom': axis})
-        plot.addLegend()
+        self._plot = pg.PlotWidget(title=title)
+        self._plot.setAxisItems({'bottom': pg.DateAxisItem()})
+        self._plot.addLegend()
+        self._accuracy_plot = pg.PlotWidget()
+        self._accuracy_plot.setAxisItems({'bottom': pg.DateAxisItem()})
+        self._accuracy_plot.setXLink(self._plot)
+        self._accuracy_plot.setYRange(0, 100)
+        self._accuracy_plot.addLegend()
+        for p in (self._plot, self._accuracy_plot):
+            p.setDownsampling(auto=True, mode='peak')
+            p.setClipToView(True)
 
-        layout.addWidget(plot)
+        self._resolution_radio_group = RadioGroupWidget(
+            widgets=[
+                ValueRadioButton(Resolution.ENTRY, 'per quiz'),
+                ValueRadioButton(Resolution.DAY, 'daily'),
+                ValueRadioButton(Resolution.WEEK, 'weekly'),
+            ],
+            default=resolution,
+        )
+        for widget in self._resolution_radio_group.widgets:
+            widget.toggled.connect(self.on_resolution_toggled)
+
+        layout.addWidget(self._plot, 0, 0, 2, 1)
+        layout.addWidget(self._accuracy_plot, 2, 0)
+        layout.addWidget(
+            group_widgets(*self._resolution_radio_group.widgets, title='resolution', layout=QHBoxLayout),
+            3, 0,
+        )
         self.setLayout(layout)
 
-        entries = self.get_entries(paths)
-        timestamp_series = [e.timestamp.timestamp() for e in entries]
-        timestamp_series = [i for i, _ in enumerate(timestamp_series, start=1)]
-        plot.plot(
-            x=timestamp_series,
-            y=[e.correct for e in entries],
+        self.plot(resolution)
+        self.show()
+
+    def on_resolution_toggled(self, checked: bool) -> None:
+        if checked:
+            self.plot(self._resolution_radio_group.selected.value)
+
+    def plot(self, resolution: Resolution) -> None:
+        if resolution == Resolution.ENTRY:
+            if self._entries is None:
+                self._entries = get_stats().get_entries_for_paths(self._paths)
+            rows = self._entries
+            x, correct, incorrect, total = aggregate_series(rows)
+        else:
+            rows = get_stats().get_rollup(self._paths, resolution)
+            x, correct, incorrect, total = bucket_series(rows)
+
+        self._plot.clear()
+        self._accuracy_plot.clear()
+        with_symbols = len(rows) <= settings.STATS_SYMBOLS_LIMIT
+        self._plot.plot(
+            x=x,
+            y=correct,
             pen='g',
             name='Correct count',
-            symbol='o',
+            symbol='o' if with_symbols else None,
             symbolBrush='g',
         )
-        plot.plot(
-            x=timestamp_series,
-            y=[e.incorrect for e in entries],
+        self._plot.plot(
+            x=x,
+            y=incorrect,
             fill_level=0,
             pen='r',
-            symbol='o',
+            symbol='o' if with_symbols else None,
             name='Incorrect count',
             symbolBrush='r',
         )
-        plot.plot(
-            x=timestamp_series,
-            y=[e.total for e in entries],
+        self._plot.plot(
+            x=x,
+            y=total,
             pen='y',
             name='Total count',
-            symbol='o',
+            symbol='o' if with_symbols else None,
             symbolBrush='y',
         )
-
-        self.show()
-
-    def get_entries(self, paths: List[Path]) -> List[Entry]:
-        if len(STATS.entries) == 0:
-            return []
-
-        ret = []
-        previous, *rest = sorted(
-            STATS.get_entries_for_paths(paths),
-            key=lambda e: e.timestamp,
+        self._accuracy_plot.plot(
+            x=x,
+            y=percentage(correct, total),
+            pen='c',
+            name='Accuracy %',
+        )
+        self._accuracy_plot.plot(
+            x=x,
+            y=rolling_accuracy(rows, settings.STATS_MOVING_AVERAGE_WINDOW),
+            pen='m',
+            name=f'Accuracy % (last {settings.STATS_MOVING_AVERAGE_WINDOW} {_WINDOW_UNITS[resolution]})',
         )
-        prev = {previous.quiz_path: previous}
-        ret.append(previous)
-        for entry in rest:
-            prev[entry.quiz_path] = entry
-            ret.append(sum(prev.values(), start=Entry()))
-        return ret
+        self._plot.autoRange()
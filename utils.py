@@ -1,8 +1,6 @@
 from __future__ import annotations
 
-import codecs
 from datetime import timedelta
-from pathlib import Path
 from typing import Optional
 from typing import TypedDict
 
@@ -21,16 +19,6 @@ class _GroupWidgetKwargs(TypedDict, total=False):
     max_width: int
 
 
-def is_utf8(filename: str | Path) -> bool:
-    try:
-        f = codecs.open(str(filename), encoding='utf-8', errors='strict')
-        for line in f:
-            pass
-        return True
-    except UnicodeDecodeError:
-        return False
-
-
 def group_widgets(
         *widgets: QWidget,
         title: str = '',